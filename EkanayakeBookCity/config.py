@@ -6,4 +6,57 @@ DB_CONFIG = {
 }
 
 # Advertisement Rate
-AD_RATE_PER_WORD = 20.00 
\ No newline at end of file
+AD_RATE_PER_WORD = 20.00 
+
+# Connection Pool
+DB_POOL_SIZE = 8              # Max open connections shared by the GUI and background work
+DB_POOL_TIMEOUT = 10          # Seconds to wait for a free connection before giving up
+DB_POOL_IDLE_RECYCLE = 300    # Seconds a connection may sit idle before it is replaced
+DB_POOL_PING_AFTER = 30       # Seconds idle after which a connection is pinged before it is reused
+BULK_CHUNK_SIZE = 500         # Rows per multi-row statement in Database.execute_many
+PREPARED_STATEMENT_CACHE_SIZE = 64   # Prepared statements kept per pooled connection (0 disables)
+STREAM_CHUNK_SIZE = 1000      # Rows per chunk read from unbuffered report cursors
+
+# Query Instrumentation
+SLOW_QUERY_THRESHOLD_MS = 200   # Statements at or above this latency go to the slow-query log
+SLOW_QUERY_LOG_SIZE = 100       # Most recent slow queries kept in memory
+QUERY_STATS_ON_EXIT = False     # Print the query stats report when the app closes
+
+# Schema
+AUTO_MIGRATE = True             # Apply pending database/migrations.py migrations at startup
+
+# Lists
+LIST_PAGE_SIZE = 100            # Rows fetched per page as list views are scrolled
+
+# Caching
+REFERENCE_CACHE_CHECK_SECONDS = 5   # How often cached customers/publications check for other clients' changes
+DASHBOARD_CACHE_TTL = 30            # Seconds dashboard counts may lag behind other clients' writes
+
+# Search
+SEARCH_MODE = 'memory'          # 'memory' (in-process index), 'fulltext' (FULLTEXT index) or 'like'
+FULLTEXT_QUERY_MODE = 'boolean' # 'boolean' (every word, as a prefix) or 'natural' (natural-language relevance)
+FULLTEXT_MIN_TOKEN_SIZE = 3     # Server's innodb_ft_min_token_size; shorter words fall back to LIKE
+SEARCH_RESULT_LIMIT = 50        # Ranked publication matches returned per search
+SEARCH_DEBOUNCE_MS = 150        # Typing pause before search-as-you-type runs
+
+# Reports
+REPORT_DISPLAY_LIMIT = 5000     # Rows shown on the Reports page; exports always get every row
+EXPORT_GZIP_LEVEL = 5           # gzip level for .csv.gz exports (1 fastest, 9 smallest)
+ANALYTICS_MOVING_AVERAGE_DAYS = 7   # Window of the moving average in the Daily Revenue Trend report
+REPORT_CACHE_SIZE = 16          # Finished reports kept for regeneration and export (least recently used evicted)
+REPORT_CACHE_MAX_ROWS = 50000   # Reports longer than this are streamed but not cached
+
+# Invoicing
+INVOICES_DIR = "Invoices"       # Folder batch invoice runs write to
+INVOICE_WORKERS = 4             # Processes rendering invoices in a batch run (1 renders in-process)
+INVOICE_CHUNK_SIZE = 250        # Invoices handed to a worker process at a time
+INVOICE_PARALLEL_MIN = 1000     # Runs with fewer bills render in-process; starting workers would cost more
+STATEMENTS_DIR = "Statements"   # Folder month-end statement runs write to
+
+# Background Work
+DB_WORKER_THREADS = 4           # Threads running DAO calls off the Tk thread (keep <= DB_POOL_SIZE)
+
+# Subscription Order Generation
+SUBSCRIPTION_BATCH_SIZE = 200   # Subscriptions turned into orders per transaction
+SUBSCRIPTION_CATCH_UP_DAYS = 31 # Missed run days back-filled when generation catches up
+SUBSCRIPTION_GENERATION_WORKERS = 4   # Customer partitions generated in parallel (keep below DB_POOL_SIZE)
@@ -0,0 +1,16 @@
+from concurrent.futures import ThreadPoolExecutor
+from config import DB_WORKER_THREADS
+
+# Worker threads for DAO calls made off the Tk thread. Each worker checks out its
+# own pooled connection, so keep this at or below DB_POOL_SIZE.
+_executor = ThreadPoolExecutor(max_workers=DB_WORKER_THREADS, thread_name_prefix="dao-worker")
+
+
+def submit(fn, *args, **kwargs):
+    """Runs ``fn(*args, **kwargs)`` on a DAO worker thread and returns its ``Future``."""
+    return _executor.submit(fn, *args, **kwargs)
+
+
+def shutdown():
+    """Drops queued work and lets running calls finish in the background."""
+    _executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,251 @@
+import threading
+import time
+from collections import OrderedDict
+from .db_connector import Database
+from config import (REFERENCE_CACHE_CHECK_SECONDS, DASHBOARD_CACHE_TTL, REPORT_CACHE_SIZE, REPORT_CACHE_MAX_ROWS,
+                    STREAM_CHUNK_SIZE)
+
+
+class DataVersions:
+    """Per-table version stamps kept in the ``data_versions`` table.
+
+    Every DAO write bumps the stamp of the tables it touched, inside the same
+    transaction as the write. Caches remember the stamp they were loaded at and
+    compare it with one primary-key read to learn whether any client changed
+    the data since. In-process caches can also ``subscribe`` to be told about
+    local writes as soon as they commit.
+    """
+
+    _listeners = []
+
+    @classmethod
+    def subscribe(cls, tables, callback):
+        """Calls ``callback(table)`` after every committed local write to one of ``tables``."""
+        cls._listeners.append((frozenset(tables), callback))
+
+    @classmethod
+    def bump(cls, table):
+        """Increments ``table``'s version and returns the new value.
+
+        Joins the caller's transaction when there is one. ``LAST_INSERT_ID(expr)``
+        hands the new value back in the same round-trip.
+        """
+        query = "INSERT INTO data_versions (table_name, version) VALUES (%s, 1) ON DUPLICATE KEY UPDATE version = LAST_INSERT_ID(version + 1)"
+        # A fresh row reports no insert id, so execute_query falls back to its rowcount of 1 -- also its version.
+        version = Database.execute_query(query, (table,))
+
+        tx = Database.current_transaction()
+        if tx is not None:
+            tx.after_commit(lambda: cls._notify(table))
+        elif version is not None:
+            cls._notify(table)
+        return version
+
+    @classmethod
+    def bump_all(cls, *tables):
+        """Increments the version of every table in ``tables`` with one statement.
+
+        The rows are locked in table name order whatever order the caller uses,
+        so concurrent transactions bumping overlapping tables can't deadlock here.
+        """
+        tables = sorted(set(tables))
+        values = ", ".join(["(%s, 1)"] * len(tables))
+        query = f"INSERT INTO data_versions (table_name, version) VALUES {values} ON DUPLICATE KEY UPDATE version = version + 1"
+        result = Database.execute_query(query, tables)
+
+        tx = Database.current_transaction()
+        for table in tables:
+            if tx is not None:
+                tx.after_commit(lambda table=table: cls._notify(table))
+            elif result is not None:
+                cls._notify(table)
+        return result
+
+    @classmethod
+    def _notify(cls, table):
+        for tables, callback in cls._listeners:
+            if table in tables:
+                callback(table)
+
+    @staticmethod
+    def current(*tables):
+        """Returns ``{table: version}`` for the given tables (0 for tables never written)."""
+        placeholders = ", ".join(["%s"] * len(tables))
+        query = f"SELECT table_name, version FROM data_versions WHERE table_name IN ({placeholders})"
+        rows = Database.execute_query(query, tables, fetch='all')
+        if rows is None:
+            return None
+        versions = dict.fromkeys(tables, 0)
+        versions.update({row['table_name']: row['version'] for row in rows})
+        return versions
+
+
+class ReferenceCache:
+    """Process-wide copy of a small reference table, ordered by its key descending.
+
+    Reads are served from memory. At most every ``check_seconds`` a single
+    version read decides whether another client changed the table, in which
+    case it is reloaded. Local writes patch the cached rows in place when the
+    cache was current right before the write, and invalidate it otherwise.
+    """
+
+    def __init__(self, table, key, check_seconds=REFERENCE_CACHE_CHECK_SECONDS):
+        self.table = table
+        self.key = key
+        self.check_seconds = check_seconds
+        self._lock = threading.RLock()
+        self._rows = None
+        self._version = None
+        self._checked_at = 0.0
+
+    def get(self):
+        """Returns the cached rows (newest first), or ``None`` if the table can't be read."""
+        with self._lock:
+            now = time.monotonic()
+            if self._rows is not None and now - self._checked_at < self.check_seconds:
+                return self._rows
+
+            versions = DataVersions.current(self.table)
+            if versions is None:
+                return self._rows
+            self._checked_at = now
+            if self._rows is not None and versions[self.table] == self._version:
+                return self._rows
+
+            rows = Database.execute_query(f"SELECT * FROM {self.table} ORDER BY {self.key} DESC", fetch='all')
+            if rows is None:
+                return self._rows
+            self._rows, self._version = rows, versions[self.table]
+            return self._rows
+
+    @property
+    def version(self):
+        """Version of the rows currently cached, ``None`` when nothing is cached."""
+        return self._version
+
+    def invalidate(self):
+        with self._lock:
+            self._rows = None
+            self._version = None
+
+    def apply_insert(self, rows, version):
+        self._patch(version, lambda cached: sorted(rows, key=lambda row: row[self.key], reverse=True) + cached)
+
+    def apply_update(self, row, version):
+        self._patch(version, lambda cached: [row if r[self.key] == row[self.key] else r for r in cached])
+
+    def apply_delete(self, key_value, version):
+        self._patch(version, lambda cached: [r for r in cached if r[self.key] != key_value])
+
+    def _patch(self, version, change):
+        with self._lock:
+            if self._rows is None:
+                return
+            if version is None or self._version is None or version != self._version + 1:
+                # Someone else wrote in between; let the next read reload.
+                self.invalidate()
+                return
+            self._rows = change(self._rows)
+            self._version = version
+
+
+class TTLCache:
+    """Small keyed cache whose entries expire after ``ttl`` seconds.
+
+    Subscribed to ``DataVersions`` for ``tables``, so any committed local write
+    to those tables clears it immediately; the TTL bounds how long other
+    clients' writes can go unseen.
+    """
+
+    def __init__(self, tables, ttl=DASHBOARD_CACHE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = {}
+        DataVersions.subscribe(tables, lambda table: self.invalidate())
+
+    def get(self, key, loader):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                return entry[1]
+        value = loader()
+        if value is not None:
+            with self._lock:
+                self._entries[key] = (time.monotonic(), value)
+        return value
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class _ReportEntry:
+
+    def __init__(self, tables, versions, rows):
+        self.tables = tables
+        self.versions = versions
+        self.rows = rows
+
+
+class ReportCache:
+    """LRU cache of finished reports keyed by report type and parameters.
+
+    An entry remembers the data versions of the tables the report reads and is
+    served again only while they are unchanged, which one primary-key read
+    confirms before every hit. Even reports over past dates are checked: orders
+    can be back-dated, old bills paid and customers or publications renamed.
+    Committed local writes drop the entries they affect straight away.
+    """
+
+    def __init__(self, tables, max_entries=REPORT_CACHE_SIZE, max_rows=REPORT_CACHE_MAX_ROWS):
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        DataVersions.subscribe(tables, self._on_write)
+
+    def stream(self, key, tables, load, chunk_size=STREAM_CHUNK_SIZE):
+        """Yields the report for ``key`` in chunks, from memory or from the ``load()`` stream.
+
+        A loaded report is cached only once the stream has been read to the end.
+        """
+        versions = DataVersions.current(*tables)
+        rows = self._lookup(key, versions)
+        if rows is not None:
+            for start in range(0, len(rows), chunk_size):
+                yield rows[start:start + chunk_size]
+            return
+
+        rows = []
+        for chunk in load():
+            if rows is not None:
+                rows.extend(chunk)
+                if len(rows) > self.max_rows:
+                    rows = None
+            yield chunk
+        if rows is not None and versions is not None:
+            self._store(key, _ReportEntry(frozenset(tables), versions, rows))
+
+    def _lookup(self, key, versions):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or versions is None or entry.versions != versions:
+                return None
+            self._entries.move_to_end(key)
+            return entry.rows
+
+    def _store(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _on_write(self, table):
+        with self._lock:
+            for key in [key for key, entry in self._entries.items() if table in entry.tables]:
+                del self._entries[key]
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
@@ -1,5 +1,90 @@
+from mysql.connector import Error
 from .db_connector import Database
+from .cache import DataVersions, ReferenceCache, TTLCache, ReportCache
+from .schedule import next_run_on_or_after
+from .search_index import SearchIndex, normalize
+from .rollup import SalesRollup
+from .ledger import CustomerLedger
+from config import SEARCH_RESULT_LIMIT, SEARCH_MODE, FULLTEXT_QUERY_MODE, FULLTEXT_MIN_TOKEN_SIZE, STREAM_CHUNK_SIZE, BULK_CHUNK_SIZE
 from datetime import date
+from decimal import Decimal
+
+PUBLICATION_CACHE = ReferenceCache("publications", "publication_id")
+CUSTOMER_CACHE = ReferenceCache("customers", "customer_id")
+PUBLICATION_INDEX = SearchIndex(PUBLICATION_CACHE)
+DASHBOARD_CACHE = TTLCache(("publications", "customers", "orders", "advertisements"))
+REPORT_CACHE = ReportCache(("publications", "customers", "orders", "stock", "bills"))
+
+def _where(filters, extra=None):
+    """Builds a WHERE clause from ``{column: value}`` filters, skipping ``None`` values."""
+    clauses, params = [], []
+    for column, value in filters.items():
+        if value is not None:
+            clauses.append(f"{column} = %s")
+            params.append(value)
+    if extra:
+        clauses.append(extra[0])
+        params.extend(extra[1])
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+def _keyset_page(select, key_column, order_by, after, limit, filters):
+    """Returns one page of ``select`` ordered by ``key_column`` descending.
+
+    ``after`` is the key of the last row on the previous page; the next page is
+    found with an index seek instead of OFFSET, so every page costs the same.
+    Without ``limit`` the whole (filtered) result is returned.
+    """
+    seek = (f"{key_column} < %s", [after]) if after is not None else None
+    where, params = _where(filters, seek)
+    query = f"{select}{where} ORDER BY {order_by}"
+    if limit is not None:
+        query += " LIMIT %s"
+        params.append(limit)
+    return Database.execute_query(query, params, fetch='all')
+
+def _cached_page(cache, key_column, after, limit, filters):
+    """Serves a ``get_all`` page from a ``ReferenceCache``; ``None`` if the cache can't be loaded."""
+    rows = cache.get()
+    if rows is None:
+        return None
+    page = []
+    for row in rows:
+        if after is not None and row[key_column] >= after:
+            continue
+        if any(value is not None and row[column] != value for column, value in filters.items()):
+            continue
+        page.append(row)
+        if limit is not None and len(page) >= limit:
+            break
+    return page
+
+def _versioned_write(table, work):
+    """Runs ``work(tx)`` and bumps ``table``'s data version in one transaction.
+
+    Returns ``(result, version)``, or ``(None, None)`` if it was rolled back.
+    """
+    try:
+        with Database.transaction() as tx:
+            result = work(tx)
+            version = DataVersions.bump(table)
+    except Error as e:
+        print(f"Query failed: '{e}'")
+        return None, None
+    return result, version
+
+def _estimate_count(table, filters):
+    """Cheap row-count estimate for list headers.
+
+    Unfiltered lists use the table statistics; filtered ones use the optimizer's
+    row estimate from EXPLAIN, which never scans the table.
+    """
+    where, params = _where(filters)
+    if not params:
+        query = "SELECT table_rows AS total FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s"
+        result = Database.execute_query(query, (table,), fetch='one')
+        return result['total'] if result and result['total'] is not None else 0
+    plan = Database.execute_query(f"EXPLAIN SELECT 1 FROM {table}{where}", params, fetch='all')
+    return plan[0]['rows'] if plan else 0
 
 class UserDAO:
     
@@ -14,38 +99,131 @@ class UserDAO:
 class PublicationDAO:
 
     @staticmethod
-    def get_all():
-        query = "SELECT * FROM publications ORDER BY publication_id DESC"
-        return Database.execute_query(query, fetch='all')
+    def get_all(after=None, limit=None, category=None):
+        page = _cached_page(PUBLICATION_CACHE, "publication_id", after, limit, {"category": category})
+        if page is not None:
+            return page
+        return _keyset_page("SELECT * FROM publications", "publication_id", "publication_id DESC",
+                            after, limit, {"category": category})
+
+    @staticmethod
+    def estimate_count(category=None):
+        return _estimate_count("publications", {"category": category})
 
     @staticmethod
     def add(category, title, publisher, publish_type, price):
         query_pub = "INSERT INTO publications (category, title, publisher, publish_type, price) VALUES (%s, %s, %s, %s, %s)"
         params_pub = (category, title, publisher, publish_type, price)
-        publication_id = Database.execute_query(query_pub, params_pub)
-        
+        query_stock = "INSERT INTO stock (publication_id, quantity) VALUES (%s, 0)"
+
+        def work(tx):
+            publication_id = tx.execute(query_pub, params_pub)
+            tx.execute(query_stock, (publication_id,))
+            return publication_id
+
+        publication_id, version = _versioned_write("publications", work)
         if publication_id:
-            query_stock = "INSERT INTO stock (publication_id, quantity) VALUES (%s, 0)"
-            Database.execute_query(query_stock, (publication_id,))
+            rows = [PublicationDAO._row(publication_id, *params_pub)]
+            PUBLICATION_CACHE.apply_insert(rows, version)
+            PUBLICATION_INDEX.apply_insert(rows, version)
         return publication_id
 
+    @staticmethod
+    def add_many(publications):
+        """Bulk-inserts ``(category, title, publisher, publish_type, price)`` tuples with empty stock rows.
+
+        Returns the new publication ids, or ``None`` if nothing was written.
+        """
+        query_pub = "INSERT INTO publications (category, title, publisher, publish_type, price) VALUES (%s, %s, %s, %s, %s)"
+        query_stock = "INSERT INTO stock (publication_id, quantity) VALUES (%s, 0)"
+        publications = list(publications)
+
+        def work(tx):
+            result = tx.execute_many(query_pub, publications, return_ids=True)
+            tx.execute_many(query_stock, ((pub_id,) for pub_id in result.ids))
+            return result.ids
+
+        ids, version = _versioned_write("publications", work)
+        if ids:
+            rows = [PublicationDAO._row(pub_id, *params) for pub_id, params in zip(ids, publications)]
+            PUBLICATION_CACHE.apply_insert(rows, version)
+            PUBLICATION_INDEX.apply_insert(rows, version)
+        return ids
+
     @staticmethod
     def update(pub_id, category, title, publisher, publish_type, price):
         query = "UPDATE publications SET category=%s, title=%s, publisher=%s, publish_type=%s, price=%s WHERE publication_id=%s"
         params = (category, title, publisher, publish_type, price, pub_id)
-        return Database.execute_query(query, params)
+        result, version = _versioned_write("publications", lambda tx: tx.execute(query, params))
+        if result is not None:
+            row = PublicationDAO._row(pub_id, category, title, publisher, publish_type, price)
+            PUBLICATION_CACHE.apply_update(row, version)
+            PUBLICATION_INDEX.apply_update(row, version)
+        return result
 
     @staticmethod
     def delete(pub_id):
         query = "DELETE FROM publications WHERE publication_id=%s"
-        return Database.execute_query(query, (pub_id,))
+        result, version = _versioned_write("publications", lambda tx: tx.execute(query, (pub_id,)))
+        if result is not None:
+            PUBLICATION_CACHE.apply_delete(pub_id, version)
+            PUBLICATION_INDEX.apply_delete(pub_id, version)
+        return result
 
     @staticmethod
-    def search_by_name(name):
-        query = "SELECT publication_id, title, publisher, price FROM publications WHERE title LIKE %s"
-        params = (f"%{name}%",)
+    def _row(pub_id, category, title, publisher, publish_type, price):
+        return {'publication_id': pub_id, 'category': category, 'title': title, 'publisher': publisher,
+                'publish_type': publish_type, 'price': Decimal(str(price))}
+
+    @staticmethod
+    def search_by_name(name, limit=SEARCH_RESULT_LIMIT):
+        """Ranked title/publisher matches.
+
+        ``SEARCH_MODE`` picks the in-memory index, the FULLTEXT index or a plain
+        LIKE scan; the first two fall back to LIKE when they can't answer.
+        """
+        results = None
+        if SEARCH_MODE == 'memory':
+            results = PUBLICATION_INDEX.search(name, limit)
+        elif SEARCH_MODE == 'fulltext':
+            results = PublicationDAO._fulltext_search(name, limit)
+        if results is not None:
+            return results
+        query = "SELECT publication_id, title, publisher, price FROM publications WHERE title LIKE %s LIMIT %s"
+        params = (f"%{name}%", limit)
         return Database.execute_query(query, params, fetch='all')
 
+    @staticmethod
+    def _fulltext_search(name, limit):
+        """Relevance-ordered matches from ``ft_publications_title_publisher``.
+
+        Boolean mode requires every word and treats it as a prefix, which suits
+        search-as-you-type; natural-language mode ranks any-word matches.
+        Words shorter than the server's token size can't be matched, so a query
+        made only of those returns ``None`` for the caller's fallback.
+        """
+        terms = [term for term in normalize(name).split() if len(term) >= FULLTEXT_MIN_TOKEN_SIZE]
+        if not terms:
+            return None
+        if FULLTEXT_QUERY_MODE == 'boolean':
+            against, mode = " ".join(f"+{term}*" for term in terms), "IN BOOLEAN MODE"
+        else:
+            against, mode = " ".join(terms), "IN NATURAL LANGUAGE MODE"
+        query = f"""
+            SELECT publication_id, title, publisher, price, MATCH (title, publisher) AGAINST (%s {mode}) AS relevance
+            FROM publications
+            WHERE MATCH (title, publisher) AGAINST (%s {mode})
+            ORDER BY relevance DESC, title
+            LIMIT %s
+        """
+        return Database.execute_query(query, (against, against, limit), fetch='all')
+
+    @staticmethod
+    def warm_search_index():
+        if SEARCH_MODE != 'memory':
+            return False
+        return PUBLICATION_INDEX.build()
+
     @staticmethod
     def get_count():
         query = "SELECT COUNT(*) as total FROM publications"
@@ -55,26 +233,67 @@ class PublicationDAO:
 class CustomerDAO:
 
     @staticmethod
-    def get_all():
-        query = "SELECT * FROM customers ORDER BY customer_id DESC"
-        return Database.execute_query(query, fetch='all')
+    def get_all(after=None, limit=None, customer_type=None):
+        page = _cached_page(CUSTOMER_CACHE, "customer_id", after, limit, {"customer_type": customer_type})
+        if page is not None:
+            return page
+        return _keyset_page("SELECT * FROM customers", "customer_id", "customer_id DESC",
+                            after, limit, {"customer_type": customer_type})
+
+    @staticmethod
+    def estimate_count(customer_type=None):
+        return _estimate_count("customers", {"customer_type": customer_type})
+
+    @staticmethod
+    def get_balance(customer_id):
+        """Total billed, paid and outstanding plus the oldest unpaid due date, from the ledger."""
+        query = "SELECT customer_id, total_billed, total_paid, outstanding, oldest_unpaid_due FROM customer_balances WHERE customer_id = %s"
+        result = Database.execute_query(query, (customer_id,), fetch='one')
+        if result is None:
+            return {'customer_id': customer_id, 'total_billed': Decimal('0.00'), 'total_paid': Decimal('0.00'),
+                    'outstanding': Decimal('0.00'), 'oldest_unpaid_due': None}
+        return result
 
     @staticmethod
     def add(name, address, contact_no, customer_type):
         query = "INSERT INTO customers (name, address, contact_no, customer_type) VALUES (%s, %s, %s, %s)"
         params = (name, address, contact_no, customer_type)
-        return Database.execute_query(query, params)
+        customer_id, version = _versioned_write("customers", lambda tx: tx.execute(query, params))
+        if customer_id:
+            CUSTOMER_CACHE.apply_insert([CustomerDAO._row(customer_id, *params)], version)
+        return customer_id
+
+    @staticmethod
+    def add_many(customers):
+        """Bulk-inserts ``(name, address, contact_no, customer_type)`` tuples; returns the new ids."""
+        query = "INSERT INTO customers (name, address, contact_no, customer_type) VALUES (%s, %s, %s, %s)"
+        customers = list(customers)
+        ids, version = _versioned_write("customers", lambda tx: tx.execute_many(query, customers, return_ids=True).ids)
+        if ids:
+            CUSTOMER_CACHE.apply_insert([CustomerDAO._row(customer_id, *params) for customer_id, params in zip(ids, customers)], version)
+        return ids
 
     @staticmethod
     def update(customer_id, name, address, contact_no, customer_type):
         query = "UPDATE customers SET name=%s, address=%s, contact_no=%s, customer_type=%s WHERE customer_id=%s"
         params = (name, address, contact_no, customer_type, customer_id)
-        return Database.execute_query(query, params)
+        result, version = _versioned_write("customers", lambda tx: tx.execute(query, params))
+        if result is not None:
+            CUSTOMER_CACHE.apply_update(CustomerDAO._row(customer_id, name, address, contact_no, customer_type), version)
+        return result
 
     @staticmethod
     def delete(customer_id):
         query = "DELETE FROM customers WHERE customer_id=%s"
-        return Database.execute_query(query, (customer_id,))
+        result, version = _versioned_write("customers", lambda tx: tx.execute(query, (customer_id,)))
+        if result is not None:
+            CUSTOMER_CACHE.apply_delete(customer_id, version)
+        return result
+
+    @staticmethod
+    def _row(customer_id, name, address, contact_no, customer_type):
+        return {'customer_id': customer_id, 'name': name, 'address': address,
+                'contact_no': contact_no, 'customer_type': customer_type}
 
     @staticmethod
     def get_count():
@@ -94,14 +313,28 @@ class StockDAO:
         """Adds a specified quantity to the existing stock (relative update)."""
         query = "UPDATE stock SET quantity = quantity + %s WHERE publication_id = %s"
         params = (quantity_to_add, publication_id)
-        return Database.execute_query(query, params)
+        result, _ = _versioned_write("stock", lambda tx: tx.execute(query, params))
+        return result
 
     @staticmethod
     def update(publication_id, new_quantity):
         """Sets the quantity for a publication's stock (absolute update for corrections)."""
         query = "UPDATE stock SET quantity = %s WHERE publication_id = %s"
         params = (new_quantity, publication_id)
-        return Database.execute_query(query, params)
+        result, _ = _versioned_write("stock", lambda tx: tx.execute(query, params))
+        return result
+
+    @staticmethod
+    def add_quantities(deliveries):
+        """Applies many ``(publication_id, quantity_to_add)`` stock receipts in one transaction.
+
+        One UPDATE per ``BULK_CHUNK_SIZE`` publications; returns the stock rows changed.
+        """
+        totals = {}
+        for pub_id, quantity in deliveries:
+            totals[pub_id] = totals.get(pub_id, 0) + quantity
+        result, _ = _versioned_write("stock", lambda tx: StockDAO._adjust(tx, totals, 1))
+        return result
 
     @staticmethod
     def get_stock_quantity(publication_id):
@@ -109,29 +342,61 @@ class StockDAO:
         result = Database.execute_query(query, (publication_id,), fetch='one')
         return result['quantity'] if result else 0
 
+    @staticmethod
+    def deduct_quantities(tx, items):
+        """Decrements stock for every item in a single UPDATE inside ``tx``."""
+        totals = {}
+        for item in items:
+            totals[item['pub_id']] = totals.get(item['pub_id'], 0) + item['quantity']
+        return StockDAO._adjust(tx, totals, -1, chunk_size=None)
+
+    @staticmethod
+    def _adjust(tx, totals, sign, chunk_size=BULK_CHUNK_SIZE):
+        """Adds ``sign * quantity`` to each publication in ``{publication_id: quantity}``.
+
+        Rows are updated in publication order, ``chunk_size`` per UPDATE (all at once for ``None``).
+        """
+        pub_ids = sorted(totals)
+        chunk_size = chunk_size or max(len(pub_ids), 1)
+        operator = "+" if sign > 0 else "-"
+        changed = 0
+        for start in range(0, len(pub_ids), chunk_size):
+            chunk = pub_ids[start:start + chunk_size]
+            cases = " ".join("WHEN %s THEN %s" for _ in chunk)
+            placeholders = ", ".join(["%s"] * len(chunk))
+            query = (f"UPDATE stock SET quantity = quantity {operator} CASE publication_id {cases} END "
+                     f"WHERE publication_id IN ({placeholders})")
+            params = [value for pub_id in chunk for value in (pub_id, totals[pub_id])] + chunk
+            changed += tx.execute(query, params)
+        return changed
+
 class OrderDAO:
     
     @staticmethod
     def create_order(customer_id, order_date, total_amount, items, delivery_status, payment_status):
+        """Creates the order, its items, stock decrements and bill as one transaction.
+
+        Eight statements regardless of how many lines the order has: the order row,
+        one multi-row item INSERT, one stock UPDATE, the bill, the balance ledger
+        update, the two sales rollup upserts and one ``data_versions`` bump.
+        """
         order_query = "INSERT INTO orders (customer_id, order_date, total_amount, delivery_status, payment_status) VALUES (%s, %s, %s, %s, %s)"
-        order_params = (customer_id, order_date, total_amount, delivery_status, payment_status)
-        order_id = Database.execute_query(order_query, order_params)
-        
-        if not order_id: return None
+        item_query = "INSERT INTO order_items (order_id, publication_id, quantity, price_per_unit) VALUES (%s, %s, %s, %s)"
+        bill_query = "INSERT INTO bills (customer_id, bill_type, related_id, due_amount, due_date, status) VALUES (%s, 'Order', %s, %s, %s, %s)"
 
-        for item in items:
-            item_query = "INSERT INTO order_items (order_id, publication_id, quantity, price_per_unit) VALUES (%s, %s, %s, %s)"
-            item_params = (order_id, item['pub_id'], item['quantity'], item['price'])
-            Database.execute_query(item_query, item_params)
-            
-            stock_query = "UPDATE stock SET quantity = quantity - %s WHERE publication_id = %s"
-            stock_params = (item['quantity'], item['pub_id'])
-            Database.execute_query(stock_query, stock_params)
+        try:
+            with Database.transaction() as tx:
+                order_id = tx.execute(order_query, (customer_id, order_date, total_amount, delivery_status, payment_status))
+                tx.execute_many(item_query, [(order_id, item['pub_id'], item['quantity'], item['price']) for item in items])
+                StockDAO.deduct_quantities(tx, items)
+                bill_id = tx.execute(bill_query, (customer_id, order_id, total_amount, order_date, payment_status))
+                CustomerLedger.add_bills(tx, [bill_id])
+                SalesRollup.add_orders(tx, [order_id])
+                DataVersions.bump_all("orders", "stock", "bills")
+        except Error as e:
+            print(f"Order creation failed and was rolled back: '{e}'")
+            return None
 
-        bill_query = "INSERT INTO bills (customer_id, bill_type, related_id, due_amount, due_date, status) VALUES (%s, 'Order', %s, %s, %s, %s)"
-        bill_params = (customer_id, order_id, total_amount, order_date, payment_status)
-        Database.execute_query(bill_query, bill_params)
-        
         return order_id
 
     @staticmethod
@@ -154,17 +419,23 @@ class OrderDAO:
     @staticmethod
     def update_delivery_status(order_id, new_status):
         query = "UPDATE orders SET delivery_status = %s WHERE order_id = %s"
-        return Database.execute_query(query, (new_status, order_id))
+        result, _ = _versioned_write("orders", lambda tx: tx.execute(query, (new_status, order_id)))
+        return result
 
     @staticmethod
-    def get_all_with_details():
-        query = """
+    def get_all_with_details(after=None, limit=None, delivery_status=None, payment_status=None, customer_id=None):
+        select = """
             SELECT o.order_id, c.name AS customer_name, o.order_date, o.total_amount, o.delivery_status, o.payment_status
             FROM orders o
             JOIN customers c ON o.customer_id = c.customer_id
-            ORDER BY o.order_id DESC;
         """
-        return Database.execute_query(query, fetch='all')
+        filters = {"o.delivery_status": delivery_status, "o.payment_status": payment_status, "o.customer_id": customer_id}
+        return _keyset_page(select, "o.order_id", "o.order_id DESC", after, limit, filters)
+
+    @staticmethod
+    def estimate_count(delivery_status=None, payment_status=None, customer_id=None):
+        filters = {"delivery_status": delivery_status, "payment_status": payment_status, "customer_id": customer_id}
+        return _estimate_count("orders", filters)
 
     @staticmethod
     def get_order_items(order_id):
@@ -180,22 +451,55 @@ class SubscriptionDAO:
 
     @staticmethod
     def create_subscription(customer_id, start_date, end_date, frequency, items):
-        sub_query = "INSERT INTO subscriptions (customer_id, start_date, end_date, frequency) VALUES (%s, %s, %s, %s)"
-        sub_params = (customer_id, start_date, end_date, frequency)
-        subscription_id = Database.execute_query(sub_query, sub_params)
+        sub_query = "INSERT INTO subscriptions (customer_id, start_date, end_date, frequency, next_run_date) VALUES (%s, %s, %s, %s, %s)"
+        item_query = "INSERT INTO subscription_items (subscription_id, publication_id, quantity) VALUES (%s, %s, %s)"
+        try:
+            with Database.transaction() as tx:
+                subscription_id = tx.execute(sub_query, (customer_id, start_date, end_date, frequency, start_date))
+                tx.execute_many(item_query, [(subscription_id, item['pub_id'], item['quantity']) for item in items])
+        except Error as e:
+            print(f"Subscription creation failed and was rolled back: '{e}'")
+            return None
+        return subscription_id
 
-        if not subscription_id: return None
+    @staticmethod
+    def create_subscriptions(subscriptions):
+        """Bulk-creates subscriptions in one transaction.
 
-        for item in items:
-            item_query = "INSERT INTO subscription_items (subscription_id, publication_id, quantity) VALUES (%s, %s, %s)"
-            item_params = (subscription_id, item['pub_id'], item['quantity'])
-            Database.execute_query(item_query, item_params)
-        return subscription_id
+        ``subscriptions`` is a list of dicts with the same keys as the
+        ``create_subscription`` arguments. Returns the new subscription ids.
+        """
+        sub_query = "INSERT INTO subscriptions (customer_id, start_date, end_date, frequency, next_run_date) VALUES (%s, %s, %s, %s, %s)"
+        item_query = "INSERT INTO subscription_items (subscription_id, publication_id, quantity) VALUES (%s, %s, %s)"
+        try:
+            with Database.transaction() as tx:
+                result = tx.execute_many(sub_query, [(sub['customer_id'], sub['start_date'], sub['end_date'], sub['frequency'], sub['start_date'])
+                                                     for sub in subscriptions], return_ids=True)
+                item_rows = [(subscription_id, item['pub_id'], item['quantity'])
+                             for subscription_id, sub in zip(result.ids, subscriptions) for item in sub['items']]
+                tx.execute_many(item_query, item_rows)
+        except Error as e:
+            print(f"Bulk subscription creation failed and was rolled back: '{e}'")
+            return None
+        return result.ids
+
+    @staticmethod
+    def get_all_with_details(after=None, limit=None, status=None, customer_id=None):
+        """Subscriptions newest start date first; ``after`` is the ``(start_date, subscription_id)`` of the last row seen."""
+        seek = None
+        if after is not None:
+            last_start, last_id = after
+            seek = ("(s.start_date < %s OR (s.start_date = %s AND s.subscription_id < %s))", [last_start, last_start, last_id])
+        where, params = _where({"s.status": status, "s.customer_id": customer_id}, seek)
+        query = f"SELECT s.subscription_id, c.name AS customer_name, s.start_date, s.end_date, s.frequency, s.status FROM subscriptions s JOIN customers c ON s.customer_id = c.customer_id{where} ORDER BY s.start_date DESC, s.subscription_id DESC"
+        if limit is not None:
+            query += " LIMIT %s"
+            params.append(limit)
+        return Database.execute_query(query, params, fetch='all')
 
     @staticmethod
-    def get_all_with_details():
-        query = "SELECT s.subscription_id, c.name AS customer_name, s.start_date, s.end_date, s.frequency, s.status FROM subscriptions s JOIN customers c ON s.customer_id = c.customer_id ORDER BY s.start_date DESC"
-        return Database.execute_query(query, fetch='all')
+    def estimate_count(status=None, customer_id=None):
+        return _estimate_count("subscriptions", {"status": status, "customer_id": customer_id})
 
     @staticmethod
     def get_subscription_items(subscription_id):
@@ -204,43 +508,87 @@ class SubscriptionDAO:
         
     @staticmethod
     def update_status(subscription_id, status):
-        query = "UPDATE subscriptions SET status = %s WHERE subscription_id = %s"
-        return Database.execute_query(query, (status, subscription_id))
+        """Changes the status; reactivated subscriptions are rescheduled from today, others unscheduled."""
+        next_run_date = None
+        if status == 'Active':
+            sub = Database.execute_query("SELECT start_date, end_date, frequency FROM subscriptions WHERE subscription_id = %s",
+                                         (subscription_id,), fetch='one')
+            if sub:
+                next_run_date = next_run_on_or_after(sub['start_date'], sub['frequency'], date.today(), sub['end_date'])
+        query = "UPDATE subscriptions SET status = %s, next_run_date = %s WHERE subscription_id = %s"
+        return Database.execute_query(query, (status, next_run_date, subscription_id))
+
+    # Subscriptions that owe an order on the run date (%s): a range read on idx_subscriptions_next_run.
+    DUE_CONDITION = "s.status = 'Active' AND s.next_run_date <= %s"
 
     @staticmethod
-    def get_due_subscriptions():
-        query = "SELECT * FROM subscriptions WHERE status = 'Active' AND CURDATE() BETWEEN start_date AND end_date AND (last_generated_date IS NULL OR last_generated_date < CURDATE()) AND (frequency = 'Daily' OR (frequency = 'Weekly' AND DAYOFWEEK(CURDATE()) = DAYOFWEEK(start_date)) OR (frequency = 'Monthly' AND DAY(CURDATE()) = DAY(start_date)))"
-        return Database.execute_query(query, fetch='all')
+    def get_due_subscriptions(run_date=None):
+        run_date = run_date or date.today()
+        query = f"SELECT s.* FROM subscriptions s WHERE {SubscriptionDAO.DUE_CONDITION}"
+        return Database.execute_query(query, (run_date,), fetch='all')
+
+    @staticmethod
+    def get_due_with_items(run_date=None):
+        """Due subscriptions joined to their items and current prices, one row per item.
+
+        Subscriptions without items come back as a single row with a ``None``
+        publication_id. Rows are ordered by subscription so callers can group them.
+        """
+        run_date = run_date or date.today()
+        query = f"""
+            SELECT s.subscription_id, s.customer_id, s.start_date, s.end_date, s.frequency, si.publication_id, si.quantity, p.price
+            FROM subscriptions s
+            LEFT JOIN subscription_items si ON si.subscription_id = s.subscription_id
+            LEFT JOIN publications p ON p.publication_id = si.publication_id
+            WHERE {SubscriptionDAO.DUE_CONDITION}
+            ORDER BY s.subscription_id, si.item_id
+        """
+        return Database.execute_query(query, (run_date,), fetch='all')
 
     @staticmethod
     def update_last_generated_date(subscription_id):
         query = "UPDATE subscriptions SET last_generated_date = CURDATE() WHERE subscription_id = %s"
         return Database.execute_query(query, (subscription_id,))
 
+    @staticmethod
+    def get_earliest_next_run():
+        query = "SELECT MIN(next_run_date) AS next_run_date FROM subscriptions WHERE status = 'Active'"
+        result = Database.execute_query(query, fetch='one')
+        return result['next_run_date'] if result else None
+
 class AdvertisementDAO:
 
     @staticmethod
-    def get_all_with_details():
-        query = "SELECT a.ad_id, a.customer_id, c.name as customer_name, a.publication_id, p.title as publication_title, a.publication_date, a.cost, a.content FROM advertisements a JOIN customers c ON a.customer_id = c.customer_id JOIN publications p ON a.publication_id = p.publication_id ORDER BY a.ad_id DESC"
-        return Database.execute_query(query, fetch='all')
+    def get_all_with_details(after=None, limit=None, customer_id=None, publication_id=None):
+        select = "SELECT a.ad_id, a.customer_id, c.name as customer_name, a.publication_id, p.title as publication_title, a.publication_date, a.cost, a.content FROM advertisements a JOIN customers c ON a.customer_id = c.customer_id JOIN publications p ON a.publication_id = p.publication_id"
+        filters = {"a.customer_id": customer_id, "a.publication_id": publication_id}
+        return _keyset_page(select, "a.ad_id", "a.ad_id DESC", after, limit, filters)
+
+    @staticmethod
+    def estimate_count(customer_id=None, publication_id=None):
+        return _estimate_count("advertisements", {"customer_id": customer_id, "publication_id": publication_id})
     
     @staticmethod
     def add(customer_id, publication_id, publication_date, content, cost):
         ad_query = "INSERT INTO advertisements (customer_id, publication_id, publication_date, content, cost) VALUES (%s, %s, %s, %s, %s)"
         ad_params = (customer_id, publication_id, publication_date, content, cost)
-        ad_id = Database.execute_query(ad_query, ad_params)
+        bill_query = "INSERT INTO bills (customer_id, bill_type, related_id, due_amount, due_date, status) VALUES (%s, 'Advertisement', %s, %s, %s, 'Unpaid')"
 
-        if not ad_id: return None
+        def work(tx):
+            ad_id = tx.execute(ad_query, ad_params)
+            bill_id = tx.execute(bill_query, (customer_id, ad_id, cost, publication_date))
+            CustomerLedger.add_bills(tx, [bill_id])
+            DataVersions.bump("bills")
+            return ad_id
 
-        bill_query = "INSERT INTO bills (customer_id, bill_type, related_id, due_amount, due_date, status) VALUES (%s, 'Advertisement', %s, %s, %s, 'Unpaid')"
-        bill_params = (customer_id, ad_id, cost, publication_date)
-        Database.execute_query(bill_query, bill_params)
+        ad_id, _ = _versioned_write("advertisements", work)
         return ad_id
 
     @staticmethod
     def delete(ad_id):
         query = "DELETE FROM advertisements WHERE ad_id = %s"
-        return Database.execute_query(query, (ad_id,))
+        result, _ = _versioned_write("advertisements", lambda tx: tx.execute(query, (ad_id,)))
+        return result
 
     @staticmethod
     def get_todays_count():
@@ -251,34 +599,45 @@ class AdvertisementDAO:
 class BillingDAO:
 
     @staticmethod
-    def get_all_with_details():
-        query = "SELECT b.bill_id, b.customer_id, c.name as customer_name, b.bill_type, b.related_id, b.due_amount, b.due_date, b.status FROM bills b JOIN customers c ON b.customer_id = c.customer_id ORDER BY b.bill_id DESC"
-        return Database.execute_query(query, fetch='all')
+    def get_all_with_details(after=None, limit=None, status=None, bill_type=None, customer_id=None):
+        select = "SELECT b.bill_id, b.customer_id, c.name as customer_name, b.bill_type, b.related_id, b.due_amount, b.due_date, b.status FROM bills b JOIN customers c ON b.customer_id = c.customer_id"
+        filters = {"b.status": status, "b.bill_type": bill_type, "b.customer_id": customer_id}
+        return _keyset_page(select, "b.bill_id", "b.bill_id DESC", after, limit, filters)
 
     @staticmethod
-    def get_all_with_details():
-        query = "SELECT b.bill_id, b.customer_id, c.name as customer_name, b.bill_type, b.related_id, b.due_amount, b.due_date, b.status FROM bills b JOIN customers c ON b.customer_id = c.customer_id ORDER BY b.bill_id DESC"
-        return Database.execute_query(query, fetch='all')
+    def estimate_count(status=None, bill_type=None, customer_id=None):
+        return _estimate_count("bills", {"status": status, "bill_type": bill_type, "customer_id": customer_id})
 
     @staticmethod
     def update_status(bill_id, status):
-        get_bill_query = "SELECT bill_type, related_id FROM bills WHERE bill_id = %s"
-        bill_info = Database.execute_query(get_bill_query, (bill_id,), fetch='one')
-
-        if not bill_info:
-            print(f"Error: Bill with ID {bill_id} not found.")
-            return None
+        return BillingDAO.update_statuses([bill_id], status)
 
-        update_bill_query = "UPDATE bills SET status = %s WHERE bill_id = %s"
-        result = Database.execute_query(update_bill_query, (status, bill_id))
+    @staticmethod
+    def update_statuses(bill_ids, status):
+        """Sets ``status`` on many bills and the payment status of their orders in one transaction.
 
-        if bill_info['bill_type'] == 'Order':
-            order_id = bill_info['related_id']
-            update_order_query = "UPDATE orders SET payment_status = %s WHERE order_id = %s"
-            Database.execute_query(update_order_query, (status, order_id))
-            print(f"Synchronized payment status for Order ID: {order_id}")
-            
-        return result
+        Two set-based UPDATEs per ``BULK_CHUNK_SIZE`` bills: the bills, then the
+        orders they bill, bracketed by the customer ledger's locking read and
+        balance update. Returns the number of bills changed, or ``None`` if the
+        transaction was rolled back.
+        """
+        bill_ids = list(bill_ids)
+        changed = 0
+        try:
+            with Database.transaction() as tx:
+                for start in range(0, len(bill_ids), BULK_CHUNK_SIZE):
+                    chunk = bill_ids[start:start + BULK_CHUNK_SIZE]
+                    placeholders = ", ".join(["%s"] * len(chunk))
+                    amounts = CustomerLedger.lock_status_change(tx, chunk, status)
+                    changed += tx.execute(f"UPDATE bills SET status = %s WHERE bill_id IN ({placeholders})", [status] + chunk)
+                    tx.execute(f"UPDATE orders o JOIN bills b ON b.related_id = o.order_id AND b.bill_type = 'Order' "
+                               f"SET o.payment_status = %s WHERE b.bill_id IN ({placeholders})", [status] + chunk)
+                    CustomerLedger.apply_status_change(tx, amounts, status)
+                DataVersions.bump_all("bills", "orders")
+        except Error as e:
+            print(f"Bill status update failed and was rolled back: '{e}'")
+            return None
+        return changed
 
     @staticmethod
     def get_order_invoice_details(order_id):
@@ -317,19 +676,227 @@ class BillingDAO:
         """
         return Database.execute_query(query, (ad_id,), fetch='one')
 
+    @staticmethod
+    def get_invoice_batch(start_date, end_date, status=None):
+        """Reads everything needed to invoice the bills due in a date range, in three queries.
+
+        Returns ``{'orders': [...], 'items': [...], 'ads': [...]}`` (order and
+        ad headers carry their ``bill_id``, items their ``order_id``), or
+        ``None`` if a query fails.
+        """
+        where = " AND b.due_date BETWEEN %s AND %s"
+        params = [start_date, end_date]
+        if status is not None:
+            where += " AND b.status = %s"
+            params.append(status)
+
+        orders_query = f"""
+            SELECT b.bill_id, b.related_id AS order_id, c.name, c.address, c.contact_no,
+                   o.order_date, o.total_amount, o.payment_status
+            FROM bills b
+            JOIN orders o ON o.order_id = b.related_id
+            JOIN customers c ON o.customer_id = c.customer_id
+            WHERE b.bill_type = 'Order'{where}
+            ORDER BY b.bill_id
+        """
+        items_query = f"""
+            SELECT oi.order_id, p.title, oi.quantity, oi.price_per_unit, (oi.quantity * oi.price_per_unit) AS subtotal
+            FROM bills b
+            JOIN order_items oi ON oi.order_id = b.related_id
+            JOIN publications p ON oi.publication_id = p.publication_id
+            WHERE b.bill_type = 'Order'{where}
+            ORDER BY oi.order_id
+        """
+        ads_query = f"""
+            SELECT b.bill_id, b.related_id AS ad_id, c.name, c.address, c.contact_no,
+                   a.publication_date, a.content, a.cost, p.title AS publication_title, b.status AS payment_status
+            FROM bills b
+            JOIN advertisements a ON a.ad_id = b.related_id
+            JOIN customers c ON a.customer_id = c.customer_id
+            JOIN publications p ON a.publication_id = p.publication_id
+            WHERE b.bill_type = 'Advertisement'{where}
+            ORDER BY b.bill_id
+        """
+        batch = {}
+        for name, query in (('orders', orders_query), ('items', items_query), ('ads', ads_query)):
+            batch[name] = Database.execute_query(query, params, fetch='all')
+            if batch[name] is None:
+                return None
+        return batch
+
+class DashboardDAO:
+    """Dashboard figures, cached for ``DASHBOARD_CACHE_TTL`` seconds and cleared by local writes."""
+
+    @staticmethod
+    def get_metrics():
+        """Returns the four summary-card counts from a single round-trip."""
+        return DASHBOARD_CACHE.get(("metrics", date.today()), DashboardDAO._load_metrics)
+
+    @staticmethod
+    def _load_metrics():
+        query = """
+            SELECT
+                (SELECT COUNT(*) FROM publications) AS publications,
+                (SELECT COUNT(*) FROM customers) AS customers,
+                (SELECT COUNT(*) FROM orders WHERE delivery_status = 'Pending') AS pending_orders,
+                (SELECT COUNT(*) FROM advertisements WHERE publication_date = %s) AS todays_ads
+        """
+        return Database.execute_query(query, (date.today(),), fetch='one')
+
+    @staticmethod
+    def get_recent_orders(limit=10):
+        return DASHBOARD_CACHE.get(("recent_orders", limit), lambda: OrderDAO.get_recent_orders(limit))
+
 class ReportDAO:
+    """Report queries, each available as a list (``get_*``) or as a chunked stream (``stream_*``).
+
+    The streams read through ``Database.stream_query`` and yield lists of rows,
+    so a consumer holds one chunk at a time whatever the date range. The report
+    streams go through ``REPORT_CACHE``, so regenerating or exporting a report
+    whose tables haven't changed doesn't run the query again.
+    """
+
+    SALES_TABLES = ("orders", "customers", "publications")
+    STOCK_TABLES = ("stock", "publications")
+    STATEMENT_TABLES = ("bills",)
+
+    SALES_REPORT_QUERY = "SELECT o.order_id, o.order_date, c.name AS customer_name, p.title AS publication_title, oi.quantity, oi.price_per_unit, (oi.quantity * oi.price_per_unit) AS subtotal FROM orders o JOIN customers c ON o.customer_id = c.customer_id JOIN order_items oi ON o.order_id = oi.order_id JOIN publications p ON oi.publication_id = p.publication_id WHERE o.order_date BETWEEN %s AND %s ORDER BY o.order_date, o.order_id;"
+    STOCK_LEVEL_QUERY = "SELECT p.publication_id, p.title, p.category, s.quantity FROM stock s JOIN publications p ON s.publication_id = p.publication_id ORDER BY p.title;"
+    CUSTOMER_STATEMENT_QUERY = "SELECT bill_id, bill_type, related_id AS transaction_id, due_date, due_amount, status FROM bills WHERE customer_id = %s AND due_date BETWEEN %s AND %s ORDER BY due_date;"
+    # Every customer of a type with their bills for a period and the bills left unpaid from before it.
+    STATEMENT_RUN_QUERY = """
+        SELECT c.customer_id, c.name, c.address, c.contact_no, COALESCE(ob.opening_balance, 0) AS opening_balance,
+               b.bill_id, b.bill_type, b.related_id AS transaction_id, b.due_date, b.due_amount, b.status
+        FROM customers c
+        LEFT JOIN (SELECT customer_id, SUM(due_amount) AS opening_balance FROM bills
+                   WHERE status = 'Unpaid' AND due_date < %s GROUP BY customer_id) ob ON ob.customer_id = c.customer_id
+        LEFT JOIN bills b ON b.customer_id = c.customer_id AND b.due_date BETWEEN %s AND %s
+        WHERE c.customer_type = %s
+        ORDER BY c.customer_id, b.due_date, b.bill_id
+    """
+    # Period labels for get_sales_summary: 2024-03-05, 2024-03 and 2024.
+    _PERIODS = {'day': "d.sales_date",
+                'month': "CONCAT(YEAR(d.sales_date), '-', LPAD(MONTH(d.sales_date), 2, '0'))",
+                'year': "YEAR(d.sales_date)"}
 
     @staticmethod
     def get_sales_report(start_date, end_date):
-        query = "SELECT o.order_id, o.order_date, c.name AS customer_name, p.title AS publication_title, oi.quantity, oi.price_per_unit, (oi.quantity * oi.price_per_unit) AS subtotal FROM orders o JOIN customers c ON o.customer_id = c.customer_id JOIN order_items oi ON o.order_id = oi.order_id JOIN publications p ON oi.publication_id = p.publication_id WHERE o.order_date BETWEEN %s AND %s ORDER BY o.order_date, o.order_id;"
-        return Database.execute_query(query, (start_date, end_date), fetch='all')
+        return Database.execute_query(ReportDAO.SALES_REPORT_QUERY, (start_date, end_date), fetch='all')
 
     @staticmethod
     def get_stock_level_report():
-        query = "SELECT p.publication_id, p.title, p.category, s.quantity FROM stock s JOIN publications p ON s.publication_id = p.publication_id ORDER BY p.title;"
-        return Database.execute_query(query, fetch='all')
+        return Database.execute_query(ReportDAO.STOCK_LEVEL_QUERY, fetch='all')
 
     @staticmethod
     def get_customer_statement(customer_id, start_date, end_date):
-        query = "SELECT bill_id, bill_type, related_id AS transaction_id, due_date, due_amount, status FROM bills WHERE customer_id = %s AND due_date BETWEEN %s AND %s ORDER BY due_date;"
-        return Database.execute_query(query, (customer_id, start_date, end_date), fetch='all')
+        return Database.execute_query(ReportDAO.CUSTOMER_STATEMENT_QUERY, (customer_id, start_date, end_date), fetch='all')
+
+    @staticmethod
+    def get_sales_summary(start_date, end_date, period='month', by=None):
+        """Sales totals from the ``daily_sales`` rollup, one row per period (and per ``by`` group).
+
+        ``period`` is 'day', 'month' or 'year'; ``by`` optionally splits each
+        period by 'publication' or 'customer_type'. Rows carry ``period``,
+        ``quantity``, ``revenue`` and ``order_count``: the orders containing the
+        publication when split by publication, otherwise distinct orders.
+        Customer types are those at order time (see ``database.rollup``).
+        """
+        period_expr = ReportDAO._PERIODS[period]
+        if by == 'publication':
+            query = f"""
+                SELECT {period_expr} AS period, d.publication_id, p.title AS publication_title,
+                       SUM(d.quantity) AS quantity, SUM(d.revenue) AS revenue, SUM(d.order_count) AS order_count
+                FROM daily_sales d
+                LEFT JOIN publications p ON p.publication_id = d.publication_id
+                WHERE d.sales_date BETWEEN %s AND %s
+                GROUP BY period, d.publication_id, p.title
+                ORDER BY period, d.publication_id, p.title
+            """
+            return Database.execute_query(query, (start_date, end_date), fetch='all')
+
+        group_select, group_by, group_join = "", "", ""
+        if by == 'customer_type':
+            group_select, group_by = ", d.customer_type", ", d.customer_type"
+            group_join = " AND o.customer_type = s.customer_type"
+        query = f"""
+            SELECT s.*, COALESCE(o.order_count, 0) AS order_count
+            FROM (SELECT {period_expr} AS period{group_select}, SUM(d.quantity) AS quantity, SUM(d.revenue) AS revenue
+                  FROM daily_sales d
+                  WHERE d.sales_date BETWEEN %s AND %s
+                  GROUP BY period{group_by}) s
+            LEFT JOIN (SELECT {period_expr} AS period{group_select}, SUM(d.order_count) AS order_count
+                       FROM daily_orders d
+                       WHERE d.sales_date BETWEEN %s AND %s
+                       GROUP BY period{group_by}) o ON o.period = s.period{group_join}
+            ORDER BY s.period{group_by.replace("d.", "s.")}
+        """
+        return Database.execute_query(query, (start_date, end_date, start_date, end_date), fetch='all')
+
+    @staticmethod
+    def get_debtors(min_outstanding=0, limit=None):
+        """Customers owing more than ``min_outstanding``, largest balance first (an index range on the ledger)."""
+        query = """
+            SELECT cb.customer_id, c.name AS customer_name, cb.outstanding, cb.oldest_unpaid_due
+            FROM customer_balances cb
+            JOIN customers c ON c.customer_id = cb.customer_id
+            WHERE cb.outstanding > %s
+            ORDER BY cb.outstanding DESC
+        """
+        params = [min_outstanding]
+        if limit is not None:
+            query += " LIMIT %s"
+            params.append(limit)
+        return Database.execute_query(query, params, fetch='all')
+
+    @staticmethod
+    def get_aged_debt(min_days, as_of=None):
+        """Customers with a bill unpaid for at least ``min_days`` past its due date, oldest debt first."""
+        as_of = as_of or date.today()
+        query = """
+            SELECT cb.customer_id, c.name AS customer_name, cb.outstanding, cb.oldest_unpaid_due,
+                   DATEDIFF(%s, cb.oldest_unpaid_due) AS days_overdue
+            FROM customer_balances cb
+            JOIN customers c ON c.customer_id = cb.customer_id
+            WHERE cb.oldest_unpaid_due <= %s - INTERVAL %s DAY
+            ORDER BY cb.oldest_unpaid_due
+        """
+        return Database.execute_query(query, (as_of, as_of, min_days), fetch='all')
+
+    @staticmethod
+    def get_monthly_sales(year):
+        return ReportDAO.get_sales_summary(date(year, 1, 1), date(year, 12, 31), 'month')
+
+    @staticmethod
+    def get_yearly_sales(first_year, last_year):
+        return ReportDAO.get_sales_summary(date(first_year, 1, 1), date(last_year, 12, 31), 'year')
+
+    @staticmethod
+    def stream_sales_report(start_date, end_date, chunk_size=STREAM_CHUNK_SIZE):
+        return REPORT_CACHE.stream(("Sales Report", start_date, end_date), ReportDAO.SALES_TABLES,
+                                   lambda: Database.stream_query(ReportDAO.SALES_REPORT_QUERY, (start_date, end_date), chunk_size),
+                                   chunk_size)
+
+    @staticmethod
+    def stream_sales_lines(start_date, end_date, chunk_size=STREAM_CHUNK_SIZE):
+        """Order lines with ids, names and line revenue for the analytics engine."""
+        query = "SELECT o.order_date, o.order_id, o.customer_id, c.name AS customer_name, oi.publication_id, p.title AS publication_title, oi.quantity, (oi.quantity * oi.price_per_unit) AS revenue FROM orders o JOIN customers c ON o.customer_id = c.customer_id JOIN order_items oi ON o.order_id = oi.order_id JOIN publications p ON oi.publication_id = p.publication_id WHERE o.order_date BETWEEN %s AND %s"
+        return Database.stream_query(query, (start_date, end_date), chunk_size)
+
+    @staticmethod
+    def stream_stock_level_report(chunk_size=STREAM_CHUNK_SIZE):
+        return REPORT_CACHE.stream(("Stock Level Report",), ReportDAO.STOCK_TABLES,
+                                   lambda: Database.stream_query(ReportDAO.STOCK_LEVEL_QUERY, chunk_size=chunk_size),
+                                   chunk_size)
+
+    @staticmethod
+    def stream_statement_run(start_date, end_date, customer_type='Postpaid', chunk_size=STREAM_CHUNK_SIZE):
+        """Rows for ``statements.generate_statements``; customers without bills in the period get one row with no bill."""
+        params = (start_date, start_date, end_date, customer_type)
+        return Database.stream_query(ReportDAO.STATEMENT_RUN_QUERY, params, chunk_size)
+
+    @staticmethod
+    def stream_customer_statement(customer_id, start_date, end_date, chunk_size=STREAM_CHUNK_SIZE):
+        params = (customer_id, start_date, end_date)
+        return REPORT_CACHE.stream(("Customer Statement",) + params, ReportDAO.STATEMENT_TABLES,
+                                   lambda: Database.stream_query(ReportDAO.CUSTOMER_STATEMENT_QUERY, params, chunk_size),
+                                   chunk_size)
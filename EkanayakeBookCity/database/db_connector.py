@@ -1,45 +1,601 @@
+import re
+import threading
+import time
+from itertools import islice
+from collections import OrderedDict, deque
+from contextlib import contextmanager
 import mysql.connector
 from mysql.connector import Error
-from config import DB_CONFIG
+from mysql.connector.errors import PoolError
+from .query_stats import QUERY_STATS
+from config import (DB_CONFIG, DB_POOL_SIZE, DB_POOL_TIMEOUT, DB_POOL_IDLE_RECYCLE, DB_POOL_PING_AFTER,
+                    BULK_CHUNK_SIZE, PREPARED_STATEMENT_CACHE_SIZE, STREAM_CHUNK_SIZE)
+
+
+_MULTI_ROW_INSERT = re.compile(
+    r"^\s*((?:INSERT|REPLACE)\b.*?\bVALUES\s*)(\(.*?\))(\s*ON\s+DUPLICATE\s+KEY\s+UPDATE\b.*)?\s*;?\s*$",
+    re.IGNORECASE | re.DOTALL)
+
+
+class BulkResult:
+    """Outcome of ``Database.execute_many``.
+
+    ``ids`` holds the generated keys of plain INSERTs run with ``return_ids``,
+    in row order. See ``_PoolEntry.id_step`` for when they can be derived from
+    the first id of a multi-row INSERT.
+    """
+
+    def __init__(self):
+        self.rowcount = 0
+        self.ids = []
+        self.statements = 0
+
+    def __repr__(self):
+        return f"BulkResult(rowcount={self.rowcount}, ids={len(self.ids)}, statements={self.statements})"
+
+
+def _run_statement(cursor, query, params, fetch):
+    """Executes one statement on ``cursor`` and records its latency and row count."""
+    started = time.perf_counter()
+    rows = 0
+    try:
+        cursor.execute(query, params)
+        if fetch == 'one':
+            result = cursor.fetchone()
+            if result is not None:
+                cursor.fetchall()
+                rows = 1
+        elif fetch == 'all':
+            result = cursor.fetchall()
+            rows = len(result)
+        else:
+            result = None
+            rows = max(cursor.rowcount, 0)
+    except Error:
+        QUERY_STATS.record(query, (time.perf_counter() - started) * 1000, error=True, params=params)
+        raise
+    QUERY_STATS.record(query, (time.perf_counter() - started) * 1000, rows, params=params)
+    return result
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# Statement kinds the server accepts through the binary (prepared) protocol.
+_PREPARABLE = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+# Placeholder lists generated per call (IN (%s, %s, ...), CASE ... WHEN %s THEN %s WHEN ...): their text
+# changes with the number of values, so preparing them would only churn the cache.
+_GENERATED_LIST = re.compile(r"\bIN\s*\(\s*%s\s*,|\bTHEN\s+%s\s+WHEN\b", re.IGNORECASE)
+
+
+class StatementCache:
+    """Per-connection LRU of server-side prepared statements keyed by SQL text.
+
+    A hit re-executes the already prepared statement, so the server skips
+    parsing and planning. Evicted cursors are closed, which deallocates the
+    statement on the server. Statements with generated placeholder lists run
+    unprepared (``skipped``). Totals are shared by all caches.
+    """
+
+    _totals = {'hits': 0, 'misses': 0, 'evictions': 0, 'skipped': 0}
+    _totals_lock = threading.Lock()
+
+    def __init__(self, connection, capacity=PREPARED_STATEMENT_CACHE_SIZE):
+        self.connection = connection
+        self.capacity = capacity
+        self._cursors = OrderedDict()
+
+    def cursor_for(self, query):
+        """Returns the prepared cursor for ``query``, or ``None`` when caching is off."""
+        if self.capacity <= 0 or not query.lstrip()[:7].upper().startswith(_PREPARABLE):
+            return None
+        if _GENERATED_LIST.search(query):
+            self._count('skipped')
+            return None
+        cursor = self._cursors.get(query)
+        if cursor is not None:
+            self._cursors.move_to_end(query)
+            self._count('hits')
+            return cursor
+
+        cursor = self.connection.cursor(prepared=True, dictionary=True)
+        self._cursors[query] = cursor
+        self._count('misses')
+        if len(self._cursors) > self.capacity:
+            _, evicted = self._cursors.popitem(last=False)
+            self._close(evicted)
+            self._count('evictions')
+        return cursor
+
+    def discard(self, query):
+        cursor = self._cursors.pop(query, None)
+        if cursor is not None:
+            self._close(cursor)
+
+    def clear(self):
+        while self._cursors:
+            self._close(self._cursors.popitem()[1])
+
+    def __len__(self):
+        return len(self._cursors)
+
+    @staticmethod
+    def _close(cursor):
+        try:
+            cursor.close()
+        except Error:
+            pass
+
+    @classmethod
+    def _count(cls, key):
+        with cls._totals_lock:
+            cls._totals[key] += 1
+
+    @classmethod
+    def stats(cls):
+        with cls._totals_lock:
+            stats = dict(cls._totals)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        return stats
+
+    @classmethod
+    def reset_stats(cls):
+        with cls._totals_lock:
+            for key in cls._totals:
+                cls._totals[key] = 0
+
+
+class _PoolEntry:
+    """A pooled connection plus the bookkeeping the pool needs to recycle it."""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.statements = StatementCache(connection)
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.depth = 0
+        self.transaction = None
+        self._id_step = False
+
+    def id_step(self):
+        """Gap between the ids of one multi-row INSERT, or ``None`` if they needn't be evenly spaced.
+
+        With ``innodb_autoinc_lock_mode`` 0 or 1 a multi-row INSERT of known
+        length gets one block of ids ``auto_increment_increment`` apart. In
+        interleaved mode (2, the MySQL 8 default) concurrent inserts may share
+        the range, so ids can only be trusted one row at a time. Read once per
+        connection.
+        """
+        if self._id_step is False:
+            cursor = self.connection.cursor()
+            try:
+                cursor.execute("SELECT @@auto_increment_increment, @@innodb_autoinc_lock_mode")
+                increment, lock_mode = cursor.fetchall()[0]
+            finally:
+                cursor.close()
+            self._id_step = int(increment) if int(lock_mode) in (0, 1) else None
+        return self._id_step
+
+    def execute(self, query, params=None, fetch=None):
+        """Runs one statement through the prepared-statement cache without committing."""
+        cursor = self.statements.cursor_for(query)
+        owned = cursor is None
+        if owned:
+            cursor = self.connection.cursor(dictionary=True)
+        try:
+            result = _run_statement(cursor, query, params, fetch)
+            if fetch in ('one', 'all'):
+                return result
+            return cursor.lastrowid or cursor.rowcount
+        except Error:
+            if not owned:
+                self.statements.discard(query)
+            raise
+        finally:
+            if owned:
+                cursor.close()
+
+
+class Transaction:
+    """Unit of work bound to one pooled connection.
+
+    Statements run here are not committed individually; ``Database.transaction``
+    commits once when the block exits cleanly and rolls back otherwise. Errors
+    are raised instead of printed so the whole unit is undone.
+    """
+
+    def __init__(self, entry):
+        self._entry = entry
+        self.connection = entry.connection
+        self._after_commit = []
+
+    def after_commit(self, callback):
+        """Runs ``callback`` once the transaction has committed (never on rollback)."""
+        self._after_commit.append(callback)
+
+    def execute(self, query, params=None, fetch=None):
+        return self._entry.execute(query, params, fetch)
+
+    def executemany(self, query, seq_params):
+        """Runs one statement for many parameter tuples.
+
+        The connector folds INSERT ... VALUES batches into a single multi-row
+        statement, so this is one round-trip for the whole batch.
+        """
+        seq_params = list(seq_params)
+        if not seq_params:
+            return 0
+        cursor = self.connection.cursor()
+        started = time.perf_counter()
+        try:
+            cursor.executemany(query, seq_params)
+            QUERY_STATS.record(query, (time.perf_counter() - started) * 1000, max(cursor.rowcount, 0))
+            return cursor.rowcount
+        except Error:
+            QUERY_STATS.record(query, (time.perf_counter() - started) * 1000, error=True)
+            raise
+        finally:
+            cursor.close()
+
+    def execute_many(self, query, rows, chunk_size=BULK_CHUNK_SIZE, return_ids=False):
+        """Streams ``rows`` through ``query`` in chunks of ``chunk_size``.
+
+        INSERT/REPLACE ... VALUES (...) statements (optionally with ON DUPLICATE
+        KEY UPDATE) are rewritten into one multi-row statement per chunk. Other
+        statements raise ``ValueError``: they would cost a round trip per row,
+        so batch them explicitly (e.g. an UPDATE with a CASE list) or use
+        ``executemany``. With ``return_ids`` the new keys of a plain INSERT are collected in
+        ``result.ids``; when the server can't promise evenly spaced ids (see
+        ``_PoolEntry.id_step``) the rows are inserted one at a time instead.
+        """
+        result = BulkResult()
+        match = _MULTI_ROW_INSERT.match(query)
+        if not match:
+            raise ValueError("execute_many only batches INSERT/REPLACE ... VALUES statements")
+        head, row_template, tail = match.group(1), match.group(2), match.group(3) or ""
+        step = self._entry.id_step() if return_ids and not tail else None
+        one_by_one = return_ids and not tail and step is None
+        cursor = self.connection.cursor()
+        try:
+            for chunk in _chunks(rows, chunk_size):
+                if one_by_one:
+                    for row in chunk:
+                        _run_statement(cursor, query, row, None)
+                        result.ids.append(cursor.lastrowid)
+                        result.rowcount += max(cursor.rowcount, 0)
+                        result.statements += 1
+                    continue
+                sql = head + ", ".join([row_template] * len(chunk)) + tail
+                _run_statement(cursor, sql, [value for row in chunk for value in row], None)
+                if step and cursor.lastrowid:
+                    result.ids.extend(range(cursor.lastrowid, cursor.lastrowid + step * len(chunk), step))
+                result.rowcount += max(cursor.rowcount, 0)
+                result.statements += 1
+        finally:
+            cursor.close()
+        return result
+
+
+class ConnectionPool:
+    """Bounded pool of MySQL connections with per-thread checkout.
+
+    A thread that already holds a connection gets the same one back on nested
+    checkouts, so a DAO call made inside another DAO call never needs a second
+    connection. Connections that sat idle longer than ``idle_recycle`` seconds
+    are replaced before being handed out; ones idle longer than ``ping_after``
+    seconds are pinged first (outside the pool lock) and replaced if the server
+    dropped them. Recently used connections go straight back out unpinged.
+    """
+
+    def __init__(self, size, timeout, idle_recycle, ping_after=0, **connect_args):
+        self.size = size
+        self.timeout = timeout
+        self.idle_recycle = idle_recycle
+        self.ping_after = ping_after
+        self._connect_args = connect_args
+        self._idle = deque()
+        self._opened = 0
+        self._condition = threading.Condition()
+        self._local = threading.local()
+        self._stats = {'checkouts': 0, 'waits': 0, 'timeouts': 0, 'created': 0, 'recycled': 0}
+
+    def acquire(self):
+        entry = getattr(self._local, 'entry', None)
+        if entry is not None:
+            entry.depth += 1
+            return entry
+
+        entry = self._checkout()
+        entry.depth = 1
+        self._local.entry = entry
+        return entry
+
+    def release(self, entry, discard=False):
+        """Returns ``entry`` to the pool; ``discard`` closes it instead (e.g. with unread results)."""
+        entry.depth -= 1
+        if entry.depth > 0:
+            return
+        self._local.entry = None
+        entry.last_used = time.monotonic()
+        if discard:
+            self._discard(entry)
+            return
+        try:
+            # Never hand an abandoned transaction to the next borrower.
+            if entry.connection.in_transaction:
+                entry.connection.rollback()
+        except Error:
+            self._discard(entry)
+            return
+        with self._condition:
+            self._idle.append(entry)
+            self._condition.notify()
+
+    def held(self):
+        """Returns the entry checked out by the current thread, if any."""
+        return getattr(self._local, 'entry', None)
+
+    def _checkout(self):
+        deadline = time.monotonic() + self.timeout
+        with self._condition:
+            self._stats['checkouts'] += 1
+        while True:
+            entry = self._next_idle(deadline)
+            if entry is None:
+                return self._connect()
+            # Checked outside the lock so a ping doesn't stall other threads.
+            if self._is_usable(entry):
+                return entry
+            self._discard(entry, recycled=True)
+
+    def _next_idle(self, deadline):
+        """Pops an idle entry, or reserves a slot for a new connection and returns ``None``."""
+        with self._condition:
+            while True:
+                if self._idle:
+                    return self._idle.pop()
+                if self._opened < self.size:
+                    self._opened += 1
+                    return None
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolError(f"No connection available within {self.timeout}s (pool size {self.size})")
+                self._stats['waits'] += 1
+                self._condition.wait(remaining)
+
+    def _connect(self):
+        # Connect outside the lock so a slow handshake doesn't stall other threads.
+        try:
+            connection = mysql.connector.connect(**self._connect_args)
+        except Error:
+            with self._condition:
+                self._opened -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self._stats['created'] += 1
+        return _PoolEntry(connection)
+
+    def _is_usable(self, entry):
+        idle = time.monotonic() - entry.last_used
+        if idle > self.idle_recycle:
+            return False
+        if idle <= self.ping_after:
+            return True
+        try:
+            # is_connected() pings the server.
+            return entry.connection.is_connected()
+        except Error:
+            return False
+
+    def _discard(self, entry, recycled=False):
+        """Closes ``entry`` outside the lock and frees its slot."""
+        entry.statements.clear()
+        try:
+            entry.connection.close()
+        except Error:
+            pass
+        with self._condition:
+            self._opened -= 1
+            if recycled:
+                self._stats['recycled'] += 1
+            self._condition.notify()
+
+    def stats(self):
+        with self._condition:
+            stats = dict(self._stats)
+            stats.update(size=self.size, open=self._opened, idle=len(self._idle),
+                         in_use=self._opened - len(self._idle))
+        return stats
+
+    def close_all(self):
+        with self._condition:
+            idle, self._idle = list(self._idle), deque()
+        for entry in idle:
+            self._discard(entry)
+
 
 class Database:
-    _connection = None
+    _pool = None
+    _pool_lock = threading.Lock()
+
+    @classmethod
+    def get_pool(cls):
+        if cls._pool is None:
+            with cls._pool_lock:
+                if cls._pool is None:
+                    # Autocommit keeps pooled connections from pinning stale read snapshots
+                    # between borrowers; multi-statement work opens an explicit transaction.
+                    cls._pool = ConnectionPool(DB_POOL_SIZE, DB_POOL_TIMEOUT, DB_POOL_IDLE_RECYCLE,
+                                               ping_after=DB_POOL_PING_AFTER, autocommit=True, **DB_CONFIG)
+        return cls._pool
 
     @classmethod
+    @contextmanager
     def get_connection(cls):
-        if cls._connection is None or not cls._connection.is_connected():
+        """Checks a pooled connection out for the current thread.
+
+        Yields ``None`` when no connection could be made, matching the way
+        callers already treat a failed connection.
+        """
+        pool = cls.get_pool()
+        try:
+            entry = pool.acquire()
+        except Error as e:
+            print(f"Error '{e}' connecting to MySQL database")
+            yield None
+            return
+        try:
+            yield entry.connection
+        finally:
+            pool.release(entry)
+
+    @classmethod
+    @contextmanager
+    def transaction(cls):
+        """Runs the block as one transaction on the current thread's connection.
+
+        Nested calls join the outer transaction, and ``execute_query`` calls made
+        inside the block take part in it too, so DAO methods compose freely.
+        """
+        pool = cls.get_pool()
+        entry = pool.acquire()
+        try:
+            if entry.transaction is not None:
+                yield entry.transaction
+                return
+
+            entry.connection.start_transaction()
+            tx = entry.transaction = Transaction(entry)
             try:
-                cls._connection = mysql.connector.connect(**DB_CONFIG)
-                print("MySQL Database connection successful")
-            except Error as e:
-                print(f"Error '{e}' connecting to MySQL database")
-                cls._connection = None
-        return cls._connection
+                yield tx
+                entry.connection.commit()
+            except BaseException:
+                entry.connection.rollback()
+                raise
+            finally:
+                entry.transaction = None
+        finally:
+            pool.release(entry)
+
+        for callback in tx._after_commit:
+            callback()
+
+    @classmethod
+    def current_transaction(cls):
+        """The transaction open on the current thread, or ``None``."""
+        entry = cls.get_pool().held()
+        return entry.transaction if entry is not None else None
 
     @classmethod
     def execute_query(cls, query, params=None, fetch=None):
-        connection = cls.get_connection()
-        if connection is None:
+        entry = cls.get_pool().held()
+        if entry is not None and entry.transaction is not None:
+            return entry.transaction.execute(query, params, fetch)
+
+        pool = cls.get_pool()
+        try:
+            entry = pool.acquire()
+        except Error as e:
+            print(f"Error '{e}' connecting to MySQL database")
             return None
-        cursor = connection.cursor(dictionary=True) 
         try:
-            cursor.execute(query, params)
-            if fetch == 'one':
-                result = cursor.fetchone()
-            elif fetch == 'all':
-                result = cursor.fetchall()
-            else: 
-                connection.commit()
-                result = cursor.lastrowid or cursor.rowcount 
+            result = entry.execute(query, params, fetch)
+            if fetch not in ('one', 'all'):
+                entry.connection.commit()
             return result
         except Error as e:
             print(f"Query failed: '{e}'")
             return None
         finally:
-            cursor.close()
+            pool.release(entry)
+
+    @classmethod
+    def execute_many(cls, query, rows, chunk_size=BULK_CHUNK_SIZE, return_ids=False):
+        """Writes many rows in one transaction; returns a ``BulkResult`` or ``None`` on failure."""
+        entry = cls.get_pool().held()
+        if entry is not None and entry.transaction is not None:
+            return entry.transaction.execute_many(query, rows, chunk_size, return_ids)
+        try:
+            with cls.transaction() as tx:
+                return tx.execute_many(query, rows, chunk_size, return_ids)
+        except Error as e:
+            print(f"Bulk write failed and was rolled back: '{e}'")
+            return None
+
+    @classmethod
+    def stream_query(cls, query, params=None, chunk_size=STREAM_CHUNK_SIZE):
+        """Yields the rows of ``query`` as lists of at most ``chunk_size`` dicts.
+
+        Rows are read through an unbuffered cursor, so only the current chunk is
+        held in memory however large the result is. The connection stays checked
+        out until the generator is exhausted or closed, and it can't serve other
+        statements meanwhile, so the stream must be the thread's only checkout.
+        A stream closed early drops its connection rather than reading the rest.
+        Errors are raised to the consumer.
+        """
+        pool = cls.get_pool()
+        entry = pool.acquire()
+        if entry.depth > 1:
+            pool.release(entry)
+            raise Error("stream_query can't share a connection that is already checked out on this thread")
+
+        started = time.perf_counter()
+        rows = 0
+        finished = False
+        cursor = entry.connection.cursor(dictionary=True, buffered=False)
+        try:
+            cursor.execute(query, params)
+            while True:
+                chunk = cursor.fetchmany(chunk_size)
+                if not chunk:
+                    break
+                rows += len(chunk)
+                yield chunk
+            finished = True
+        except Error:
+            QUERY_STATS.record(query, (time.perf_counter() - started) * 1000, rows, error=True, params=params)
+            raise
+        finally:
+            if finished:
+                QUERY_STATS.record(query, (time.perf_counter() - started) * 1000, rows, params=params)
+                cursor.close()
+            pool.release(entry, discard=not finished)
+
+    @classmethod
+    def pool_stats(cls):
+        return cls.get_pool().stats()
+
+    @staticmethod
+    def statement_cache_stats():
+        """Prepared-statement cache hits, misses, evictions and hit ratio across all connections."""
+        return StatementCache.stats()
+
+    @staticmethod
+    def query_stats():
+        """Per-statement call counts, latency percentiles and rows, heaviest first."""
+        return QUERY_STATS.snapshot()
+
+    @staticmethod
+    def query_stats_report():
+        return QUERY_STATS.report()
+
+    @staticmethod
+    def reset_query_stats():
+        QUERY_STATS.reset()
+        StatementCache.reset_stats()
 
     @classmethod
     def close_connection(cls):
-        if cls._connection is not None and cls._connection.is_connected():
-            cls._connection.close()
-            print("MySQL connection is closed")
+        if cls._pool is not None:
+            cls._pool.close_all()
+            print("MySQL connections are closed")
@@ -0,0 +1,89 @@
+"""Writes streamed report rows straight to disk.
+
+``export_rows`` takes the chunk generator of a ``ReportDAO.stream_*`` method
+and writes CSV, gzip-compressed CSV or JSON Lines, chosen by the file name.
+Values keep their database form: dates as ISO dates and money as exact
+decimals. The file is written under a temporary name and only moved into place
+once complete, so a cancelled or failed export never leaves a partial file.
+"""
+import csv
+import gzip
+import json
+import os
+from operator import itemgetter
+from datetime import date, datetime
+from decimal import Decimal
+from config import EXPORT_GZIP_LEVEL
+
+FORMATS = {'csv': "CSV", 'csv.gz': "Compressed CSV", 'jsonl': "JSON Lines"}
+
+
+def format_for(filename):
+    """Export format implied by ``filename``'s extension (CSV when unrecognised)."""
+    name = filename.lower()
+    if name.endswith('.csv.gz') or name.endswith('.gz'):
+        return 'csv.gz'
+    if name.endswith('.jsonl') or name.endswith('.ndjson'):
+        return 'jsonl'
+    return 'csv'
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Can't export {type(value).__name__} values")
+
+
+def _open(path, fmt):
+    if fmt == 'csv.gz':
+        return gzip.open(path, 'wt', compresslevel=EXPORT_GZIP_LEVEL, newline='', encoding='utf-8')
+    return open(path, 'w', newline='', encoding='utf-8')
+
+
+def export_rows(stream, columns, filename, fmt=None, progress=None, cancel_event=None):
+    """Writes every chunk of ``stream`` to ``filename``; returns the row count, or ``None`` if cancelled.
+
+    ``progress(rows_written)`` is called after each chunk from the exporting
+    thread. The stream is closed whatever happens.
+    """
+    fmt = fmt or format_for(filename)
+    partial = f"{filename}.part"
+    rows = 0
+    try:
+        with _open(partial, fmt) as f:
+            if fmt == 'jsonl':
+                encode = json.JSONEncoder(default=_json_default, ensure_ascii=False).encode
+                for chunk in stream:
+                    if cancel_event is not None and cancel_event.is_set():
+                        break
+                    if chunk and tuple(chunk[0]) != tuple(columns):
+                        chunk = [{col: row.get(col) for col in columns} for row in chunk]
+                    f.write("\n".join(map(encode, chunk)) + "\n")
+                    rows += len(chunk)
+                    if progress:
+                        progress(rows)
+            else:
+                writer = csv.writer(f)
+                writer.writerow(columns)
+                values = itemgetter(*columns)
+                for chunk in stream:
+                    if cancel_event is not None and cancel_event.is_set():
+                        break
+                    writer.writerows(map(values, chunk))
+                    rows += len(chunk)
+                    if progress:
+                        progress(rows)
+    except BaseException:
+        stream.close()
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    stream.close()
+
+    if cancel_event is not None and cancel_event.is_set():
+        os.remove(partial)
+        return None
+    os.replace(partial, filename)
+    return rows
@@ -0,0 +1,215 @@
+"""Invoice templates, compiled once and streamed straight to files.
+
+A template is a header, an optional row repeated for every line item and a
+footer, each written with plain ``{field:spec}`` placeholders.
+``compile_part`` checks a part's fields once and caches it as a bound
+``str.format_map``, so filling it in is a single C-level call.
+``write_invoice`` writes header, rows and footer to any text file as it goes,
+without building the document in memory; ``render_invoice`` returns it as a
+string for callers that need one.
+
+Kept free of database and Tk imports so process-pool workers can load it
+cheaply; ``render_chunk`` is the task those workers run.
+"""
+import io
+import os
+import re
+import string
+from datetime import datetime
+from functools import lru_cache
+
+RULE = "=" * 70
+LINE = "-" * 70
+ITEM_COLUMNS = f"{'Item':<40} {'Qty':>5} {'Unit Price':>12} {'Subtotal':>12}"
+# Invoices in a print spool are separated by a form feed (a page break on the printer).
+PAGE_BREAK = "\f"
+
+ORDER_HEADER = f"""
+{RULE}
+                         Ekanayake Book City
+                            ORDER INVOICE
+{RULE}
+
+{{status_stamp}}
+
+Invoice #: {{bill_id}}
+Order ID:  {{order_id}}
+Date:      {{printed_at}}
+
+Bill To:
+{LINE}
+Name:    {{name}}
+Address: {{address}}
+Contact: {{contact_no}}
+
+{LINE}
+Order Details (Date: {{order_date}})
+{LINE}
+{ITEM_COLUMNS}
+{LINE}
+"""
+ORDER_ROW = "{title:<40} {quantity:>5} {price_per_unit:>12.2f} {subtotal:>12.2f}\n"
+ORDER_FOOTER = f"""
+{LINE}
+                                              TOTAL: {{total_amount:>12.2f}}
+{RULE}
+                 Thank you for your business!
+{RULE}
+"""
+
+AD_HEADER = f"""
+{RULE}
+                         Ekanayake Book City
+                        ADVERTISEMENT INVOICE
+{RULE}
+
+{{status_stamp}}
+
+Invoice #: {{bill_id}}
+Ad ID:     {{ad_id}}
+Date:      {{printed_at}}
+
+Bill To:
+{LINE}
+Name:    {{name}}
+Address: {{address}}
+Contact: {{contact_no}}
+
+{LINE}
+Advertisement Details
+{LINE}
+Publication:      {{publication_title}}
+Publication Date: {{publication_date}}
+
+Content:
+"{{content}}"
+
+{LINE}
+                                                COST: {{cost:>12.2f}}
+{RULE}
+                 Thank you for your business!
+{RULE}
+"""
+
+_FORMATTER = string.Formatter()
+_SPEC = re.compile(r"[\w<>=^+\- #,.%]*\Z")
+
+
+@lru_cache(maxsize=None)
+def compile_part(source):
+    """Compiles template text into ``fill(values)``, where ``values`` maps field names to values.
+
+    Only ``{name}`` and ``{name:spec}`` fields are allowed, so a template can't
+    reach attributes or items of its values; anything else raises
+    ``ValueError``. A missing field raises ``KeyError`` when filling in.
+    """
+    pieces = []
+    for literal, field, spec, conversion in _FORMATTER.parse(source):
+        pieces.append(literal.replace("{", "{{").replace("}", "}}"))
+        if field is None:
+            continue
+        if not field.isidentifier() or conversion or not _SPEC.match(spec or ""):
+            raise ValueError(f"Unsupported template field: {{{field}}}")
+        pieces.append("{" + field + (":" + spec if spec else "") + "}")
+    return "".join(pieces).format_map
+
+
+class InvoiceTemplate:
+
+    def __init__(self, header, row=None, footer=""):
+        self.header = compile_part(header)
+        self.row = compile_part(row) if row else None
+        self.footer = compile_part(footer)
+
+    def write(self, out, values, items=()):
+        out.write(self.header(values))
+        if self.row is not None:
+            out.writelines(map(self.row, items))
+        out.write(self.footer(values))
+
+
+def _stamp(payment_status):
+    return f"*** {payment_status.upper()} ***".center(70)
+
+
+def _order_values(bill_id, order_id, details, printed_at):
+    main_info = details['main_info']
+    return dict(main_info, bill_id=bill_id, order_id=order_id, printed_at=printed_at,
+                status_stamp=_stamp(main_info['payment_status']))
+
+
+def _ad_values(bill_id, ad_id, details, printed_at):
+    return dict(details, bill_id=bill_id, ad_id=ad_id, printed_at=printed_at,
+                status_stamp=_stamp(details['payment_status']))
+
+
+# bill_type -> (template parts, values builder, line items)
+LAYOUTS = {
+    'Order': ((ORDER_HEADER, ORDER_ROW, ORDER_FOOTER), _order_values, lambda details: details['items']),
+    'Advertisement': ((AD_HEADER,), _ad_values, lambda details: ()),
+}
+
+
+@lru_cache(maxsize=None)
+def get_template(bill_type):
+    return InvoiceTemplate(*LAYOUTS[bill_type][0])
+
+
+def invoice_filename(bill_id):
+    return f"EBC-Invoice-{bill_id}.txt"
+
+
+def write_invoice(out, bill_type, bill_id, related_id, details, printed_at=None):
+    """Streams the invoice for one bill to the text file ``out``.
+
+    ``details`` has the shape of ``BillingDAO.get_order_invoice_details`` for
+    orders and of ``get_ad_invoice_details`` for advertisements.
+    """
+    _, values, items = LAYOUTS[bill_type]
+    printed_at = printed_at or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    get_template(bill_type).write(out, values(bill_id, related_id, details, printed_at), items(details))
+
+
+def render_invoice(bill_type, bill_id, related_id, details, printed_at=None):
+    out = io.StringIO()
+    write_invoice(out, bill_type, bill_id, related_id, details, printed_at)
+    return out.getvalue()
+
+
+def render_chunk(jobs, directory, printed_at, spool_path=None):
+    """Writes ``(bill_type, bill_id, related_id, details)`` jobs as invoice files in ``directory``.
+
+    With ``spool_path`` the invoices are appended to that one file instead,
+    each followed by a page break. Returns ``(written, failures)`` where
+    failures are ``(bill_id, reason)``; a bad invoice is removed again and
+    doesn't stop the rest of the chunk.
+    """
+    written, failures = 0, []
+    spool = open(spool_path, "w", encoding="utf-8") if spool_path else None
+    try:
+        for bill_type, bill_id, related_id, details in jobs:
+            if spool is not None:
+                position = spool.tell()
+                try:
+                    write_invoice(spool, bill_type, bill_id, related_id, details, printed_at)
+                    spool.write(PAGE_BREAK)
+                    written += 1
+                except (KeyError, TypeError, ValueError, AttributeError) as e:
+                    spool.seek(position)
+                    spool.truncate()
+                    failures.append((bill_id, str(e)))
+                continue
+
+            path = os.path.join(directory, invoice_filename(bill_id))
+            try:
+                with open(path, "w", encoding="utf-8") as f:
+                    write_invoice(f, bill_type, bill_id, related_id, details, printed_at)
+                written += 1
+            except (OSError, KeyError, TypeError, ValueError, AttributeError) as e:
+                if os.path.exists(path):
+                    os.remove(path)
+                failures.append((bill_id, str(e)))
+    finally:
+        if spool is not None:
+            spool.close()
+    return written, failures
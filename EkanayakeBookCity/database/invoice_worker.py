@@ -0,0 +1,12 @@
+"""Process-pool entry point for batch invoicing.
+
+Imports nothing but ``invoice_render``, so a spawned worker starts without
+the GUI, the MySQL driver or numpy (``main.py`` keeps those behind its
+``__main__`` guard).
+"""
+from .invoice_render import render_chunk
+
+
+def render(jobs, directory, printed_at, spool_path=None):
+    """Renders one chunk of invoice jobs; see ``invoice_render.render_chunk``."""
+    return render_chunk(jobs, directory, printed_at, spool_path)
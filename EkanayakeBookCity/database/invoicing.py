@@ -0,0 +1,135 @@
+"""Batch invoicing for every bill due in a date range.
+
+The bill headers and order lines are read with the three set-based queries of
+``BillingDAO.get_invoice_batch`` instead of two queries per bill. The invoices
+are then split into chunks of ``INVOICE_CHUNK_SIZE`` and rendered on a pool of
+``INVOICE_WORKERS`` processes, each writing its files straight into the
+invoices folder, so formatting and file I/O don't contend with the GUI for
+the interpreter lock. The workers run ``invoice_worker.render``, which loads
+only the renderer. Runs under ``INVOICE_PARALLEL_MIN`` bills render
+in-process, where starting the workers would cost more than it saves. A run can also produce one print spool instead: every
+chunk is spooled to its own part file and the parts are joined in bill order.
+"""
+import multiprocessing
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from .dao import BillingDAO
+from .invoice_render import render_chunk
+from . import invoice_worker
+from config import INVOICES_DIR, INVOICE_WORKERS, INVOICE_CHUNK_SIZE, INVOICE_PARALLEL_MIN
+
+
+class InvoiceRunResult:
+
+    def __init__(self):
+        self.bills = 0
+        self.written = 0
+        self.failures = []          # (bill_id, reason)
+        self.cancelled = False
+        self.spool_path = None      # the single print file, when the run made one
+        self.fetch_seconds = 0.0
+        self.render_seconds = 0.0
+
+    @property
+    def failed(self):
+        return len(self.failures)
+
+    @property
+    def elapsed(self):
+        return self.fetch_seconds + self.render_seconds
+
+    @property
+    def per_second(self):
+        """Invoices written per second of render time."""
+        return self.written / self.render_seconds if self.render_seconds else 0.0
+
+
+def invoice_jobs(batch):
+    """Turns a ``get_invoice_batch`` result into ``(bill_type, bill_id, related_id, details)`` jobs."""
+    items = {}
+    for item in batch['items']:
+        items.setdefault(item['order_id'], []).append(item)
+    jobs = [('Order', row['bill_id'], row['order_id'], {'main_info': row, 'items': items.get(row['order_id'], [])})
+            for row in batch['orders']]
+    jobs.extend(('Advertisement', row['bill_id'], row['ad_id'], row) for row in batch['ads'])
+    jobs.sort(key=lambda job: job[1])
+    return jobs
+
+
+def generate_invoices(start_date, end_date, status=None, directory=INVOICES_DIR, workers=INVOICE_WORKERS,
+                      chunk_size=INVOICE_CHUNK_SIZE, cancel_event=None, spool_path=None, parallel_min=INVOICE_PARALLEL_MIN):
+    """Writes an invoice file for every bill due between ``start_date`` and ``end_date``.
+
+    ``status`` limits the run to 'Paid' or 'Unpaid' bills. With ``spool_path``
+    all invoices go into that single file, page break separated. Runs with
+    fewer than ``parallel_min`` bills don't start worker processes. Chunks not yet
+    started are dropped once ``cancel_event`` is set. Returns an
+    ``InvoiceRunResult``, or ``None`` if the bills couldn't be read.
+    """
+    started = time.perf_counter()
+    batch = BillingDAO.get_invoice_batch(start_date, end_date, status)
+    if batch is None:
+        return None
+    jobs = invoice_jobs(batch)
+
+    result = InvoiceRunResult()
+    result.bills = len(jobs)
+    result.fetch_seconds = time.perf_counter() - started
+    if not jobs:
+        return result
+
+    started = time.perf_counter()
+    os.makedirs(directory, exist_ok=True)
+    printed_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    chunks = [jobs[start:start + chunk_size] for start in range(0, len(jobs), chunk_size)]
+    # Extra processes only pay for their start-up with a core each and more than one chunk to share.
+    workers = min(workers, os.cpu_count() or 1, len(chunks)) if len(jobs) >= parallel_min else 1
+    parts = [f"{spool_path}.{index:05d}.part" if spool_path else None for index in range(len(chunks))]
+
+    try:
+        if workers <= 1:
+            for chunk, part in zip(chunks, parts):
+                if cancel_event is not None and cancel_event.is_set():
+                    result.cancelled = True
+                    break
+                _add_chunk(result, render_chunk(chunk, directory, printed_at, part))
+        else:
+            # "spawn" everywhere: forking a process that holds pooled connections and Tk threads isn't safe.
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+                futures = [executor.submit(invoice_worker.render, chunk, directory, printed_at, part)
+                           for chunk, part in zip(chunks, parts)]
+                for future in futures:
+                    if cancel_event is not None and cancel_event.is_set():
+                        result.cancelled = True
+                        for pending in futures:
+                            pending.cancel()
+                    if future.cancelled():
+                        continue
+                    _add_chunk(result, future.result())
+        if spool_path:
+            _join_parts(spool_path, parts)
+            result.spool_path = spool_path
+    finally:
+        for part in parts:
+            if part and os.path.exists(part):
+                os.remove(part)
+    result.render_seconds = time.perf_counter() - started
+    return result
+
+
+def _join_parts(spool_path, parts):
+    with open(spool_path, "wb") as spool:
+        for part in parts:
+            if os.path.exists(part):
+                with open(part, "rb") as f:
+                    shutil.copyfileobj(f, spool)
+
+
+def _add_chunk(result, outcome):
+    written, failures = outcome
+    result.written += written
+    result.failures.extend(failures)
@@ -0,0 +1,132 @@
+"""Customer balance ledger: billed, paid and outstanding totals per customer.
+
+``customer_balances`` is kept current inside the transactions that insert bills
+(orders, subscription generation and advertisements) and change their status
+(``BillingDAO.update_statuses``), so a balance is a primary-key read and
+"who owes more than X" or "who has debt older than N days" are index ranges
+instead of aggregates over ``bills``.
+
+Reconcile it against ``bills``, e.g. after manual data fixes, from the
+``EkanayakeBookCity`` folder with ``python -m database.ledger``.
+"""
+from mysql.connector import Error
+from .db_connector import Database
+
+CREATE_TABLE = """
+    CREATE TABLE IF NOT EXISTS customer_balances (
+        customer_id INT PRIMARY KEY,
+        total_billed DECIMAL(14, 2) NOT NULL DEFAULT 0,
+        total_paid DECIMAL(14, 2) NOT NULL DEFAULT 0,
+        outstanding DECIMAL(14, 2) NOT NULL DEFAULT 0,
+        oldest_unpaid_due DATE NULL,
+        KEY idx_customer_balances_outstanding (outstanding),
+        KEY idx_customer_balances_oldest_unpaid (oldest_unpaid_due),
+        FOREIGN KEY (customer_id) REFERENCES customers(customer_id) ON DELETE CASCADE
+    )
+"""
+
+# Balances of the selected bills per customer; {where} narrows the bills read.
+_BALANCES = """
+    SELECT customer_id, SUM(due_amount) AS total_billed, SUM(IF(status = 'Paid', due_amount, 0)) AS total_paid,
+           SUM(IF(status = 'Unpaid', due_amount, 0)) AS outstanding, MIN(IF(status = 'Unpaid', due_date, NULL)) AS oldest_unpaid_due
+    FROM bills
+    WHERE {where}
+    GROUP BY customer_id
+"""
+
+# Adds new bills to the balances (LEAST of NULL is NULL, hence the COALESCEs).
+_ADD = """
+    INSERT INTO customer_balances (customer_id, total_billed, total_paid, outstanding, oldest_unpaid_due)
+    """ + _BALANCES + """
+    ON DUPLICATE KEY UPDATE total_billed = total_billed + VALUES(total_billed), total_paid = total_paid + VALUES(total_paid),
+                            outstanding = outstanding + VALUES(outstanding),
+                            oldest_unpaid_due = LEAST(COALESCE(oldest_unpaid_due, VALUES(oldest_unpaid_due)),
+                                                      COALESCE(VALUES(oldest_unpaid_due), oldest_unpaid_due))
+"""
+
+# Overwrites the balances with freshly computed ones.
+_SET = """
+    INSERT INTO customer_balances (customer_id, total_billed, total_paid, outstanding, oldest_unpaid_due)
+    """ + _BALANCES + """
+    ON DUPLICATE KEY UPDATE total_billed = VALUES(total_billed), total_paid = VALUES(total_paid),
+                            outstanding = VALUES(outstanding), oldest_unpaid_due = VALUES(oldest_unpaid_due)
+"""
+
+_DRIFT = """
+    SELECT COUNT(*) AS drifted
+    FROM (""" + _BALANCES.format(where="1 = 1") + """) e
+    LEFT JOIN customer_balances cb ON cb.customer_id = e.customer_id
+    WHERE NOT (cb.total_billed <=> e.total_billed AND cb.total_paid <=> e.total_paid
+               AND cb.outstanding <=> e.outstanding AND cb.oldest_unpaid_due <=> e.oldest_unpaid_due)
+"""
+
+
+class CustomerLedger:
+
+    @staticmethod
+    def add_bills(tx, bill_ids):
+        """Folds freshly inserted bills into the balances inside ``tx``; one statement for any number of bills."""
+        if not bill_ids:
+            return 0
+        placeholders = ", ".join(["%s"] * len(bill_ids))
+        return tx.execute(_ADD.format(where=f"bill_id IN ({placeholders})"), list(bill_ids))
+
+    @staticmethod
+    def lock_status_change(tx, bill_ids, status):
+        """Locks the bills about to be set to ``status`` and returns ``{customer_id: amount}`` changing hands.
+
+        Call before updating the bills, then pass the result to ``apply_status_change``.
+        Bills already in ``status`` are left out so posting twice doesn't count twice.
+        """
+        placeholders = ", ".join(["%s"] * len(bill_ids))
+        query = (f"SELECT customer_id, SUM(due_amount) AS amount FROM bills WHERE bill_id IN ({placeholders}) "
+                 f"AND status <> %s GROUP BY customer_id FOR UPDATE")
+        rows = tx.execute(query, list(bill_ids) + [status], fetch='all')
+        return {row['customer_id']: row['amount'] for row in rows}
+
+    @staticmethod
+    def apply_status_change(tx, amounts, status):
+        """Moves ``amounts`` between outstanding and paid and refreshes each customer's oldest unpaid due date."""
+        if not amounts:
+            return 0
+        customer_ids = sorted(amounts)
+        sign = 1 if status == 'Paid' else -1
+        cases = " ".join("WHEN %s THEN %s" for _ in customer_ids)
+        placeholders = ", ".join(["%s"] * len(customer_ids))
+        query = f"""
+            UPDATE customer_balances cb
+            SET cb.total_paid = cb.total_paid + CASE cb.customer_id {cases} END,
+                cb.outstanding = cb.outstanding - CASE cb.customer_id {cases} END,
+                cb.oldest_unpaid_due = (SELECT MIN(b.due_date) FROM bills b WHERE b.customer_id = cb.customer_id AND b.status = 'Unpaid')
+            WHERE cb.customer_id IN ({placeholders})
+        """
+        deltas = [value for customer_id in customer_ids for value in (customer_id, sign * amounts[customer_id])]
+        return tx.execute(query, deltas + deltas + customer_ids)
+
+    @staticmethod
+    def reconcile():
+        """Recomputes every balance from ``bills``; returns how many customers had drifted, ``None`` on failure."""
+        try:
+            with Database.transaction() as tx:
+                drifted = tx.execute(_DRIFT, fetch='one')['drifted']
+                if drifted:
+                    tx.execute(_SET.format(where="1 = 1"))
+                tx.execute("DELETE FROM customer_balances WHERE customer_id NOT IN (SELECT DISTINCT customer_id FROM bills)")
+        except Error as e:
+            print(f"Customer ledger reconciliation failed and was rolled back: '{e}'")
+            return None
+        return drifted
+
+
+def rebuild_step(cursor):
+    """Migration step that fills an empty ledger from all existing bills."""
+    cursor.execute(_SET.format(where="1 = 1"))
+
+
+if __name__ == "__main__":
+    drifted = CustomerLedger.reconcile()
+    if drifted is None:
+        print("Customer ledger reconciliation failed.")
+    else:
+        print(f"Customer ledger reconciled; {drifted} customer balance(s) corrected.")
+    Database.close_connection()
@@ -0,0 +1,198 @@
+"""Versioned schema migrations applied on top of ``db_setup.sql``.
+
+Each migration has a number, a name and a list of steps. Steps are written to
+be idempotent (they check ``information_schema`` before changing anything), so
+a migration interrupted half way can simply be run again. Applied versions are
+recorded in ``schema_migrations``.
+
+Run from the ``EkanayakeBookCity`` folder with ``python -m database.migrations``
+or let ``main.py`` apply them at startup.
+"""
+from datetime import timedelta
+from mysql.connector import Error
+from .db_connector import Database
+from .schedule import next_run_on_or_after
+from . import rollup, ledger
+
+VERSION_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INT PRIMARY KEY,
+        name VARCHAR(200) NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+class Migration:
+
+    def __init__(self, version, name, *steps):
+        self.version = version
+        self.name = name
+        self.steps = steps
+
+    def apply(self, cursor):
+        for step in self.steps:
+            if callable(step):
+                step(cursor)
+            else:
+                cursor.execute(step)
+
+
+def _index_exists(cursor, table, name):
+    cursor.execute("SELECT 1 FROM information_schema.statistics WHERE table_schema = DATABASE() "
+                   "AND table_name = %s AND index_name = %s LIMIT 1", (table, name))
+    return cursor.fetchall() != []
+
+
+def _column_exists(cursor, table, column):
+    cursor.execute("SELECT 1 FROM information_schema.columns WHERE table_schema = DATABASE() "
+                   "AND table_name = %s AND column_name = %s LIMIT 1", (table, column))
+    return cursor.fetchall() != []
+
+
+def add_index(table, name, columns, kind="INDEX"):
+    """Step that creates ``name`` on ``table`` unless it already exists."""
+    def step(cursor):
+        if not _index_exists(cursor, table, name):
+            cursor.execute(f"ALTER TABLE {table} ADD {kind} {name} ({', '.join(columns)})")
+    return step
+
+
+def add_column(table, column, definition):
+    """Step that adds ``column`` to ``table`` unless it already exists."""
+    def step(cursor):
+        if not _column_exists(cursor, table, column):
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    return step
+
+
+def _backfill_next_run_dates(cursor):
+    """Schedules existing active subscriptions from today on.
+
+    Days missed before the scheduler existed are not back-filled, otherwise an
+    old subscription would produce months of orders on the first run.
+    """
+    cursor.execute("SELECT CURDATE()")
+    today = cursor.fetchall()[0][0]
+    cursor.execute("SELECT subscription_id, start_date, end_date, frequency, last_generated_date FROM subscriptions "
+                   "WHERE status = 'Active' AND next_run_date IS NULL")
+    updates = []
+    for subscription_id, start_date, end_date, frequency, last_generated_date in cursor.fetchall():
+        day = today if last_generated_date is None or last_generated_date < today else today + timedelta(days=1)
+        updates.append((next_run_on_or_after(start_date, frequency, day, end_date), subscription_id))
+    if updates:
+        cursor.executemany("UPDATE subscriptions SET next_run_date = %s WHERE subscription_id = %s", updates)
+
+
+MIGRATIONS = [
+    Migration(
+        1, "hot-path indexes",
+        # ReportDAO.get_sales_report range scan on order_date
+        add_index("orders", "idx_orders_date", ["order_date", "order_id", "customer_id"]),
+        # OrderDAO.get_pending_count
+        add_index("orders", "idx_orders_delivery_status", ["delivery_status"]),
+        # OrderDAO.get_order_items, invoice items and the sales report join
+        add_index("order_items", "idx_order_items_order", ["order_id", "publication_id", "quantity", "price_per_unit"]),
+        # ReportDAO.get_customer_statement
+        add_index("bills", "idx_bills_customer_due", ["customer_id", "due_date"]),
+        # BillingDAO.get_ad_invoice_details
+        add_index("bills", "idx_bills_type_related", ["bill_type", "related_id"]),
+        # SubscriptionDAO.get_due_subscriptions
+        add_index("subscriptions", "idx_subscriptions_status_dates", ["status", "start_date", "end_date"]),
+        # SubscriptionDAO.get_all_with_details ordering
+        add_index("subscriptions", "idx_subscriptions_start", ["start_date"]),
+        # SubscriptionDAO.get_subscription_items
+        add_index("subscription_items", "idx_subscription_items_sub", ["subscription_id", "publication_id", "quantity"]),
+        # AdvertisementDAO.get_todays_count
+        add_index("advertisements", "idx_ads_publication_date", ["publication_date"]),
+        # Stock listings ordered by title and prefix title searches
+        add_index("publications", "idx_publications_title", ["title"]),
+        # StockDAO.get_stock_quantity
+        add_index("stock", "idx_stock_publication_qty", ["publication_id", "quantity"]),
+    ),
+    Migration(
+        2, "data version stamps",
+        """
+        CREATE TABLE IF NOT EXISTS data_versions (
+            table_name VARCHAR(64) PRIMARY KEY,
+            version BIGINT NOT NULL DEFAULT 0
+        )
+        """,
+        "INSERT IGNORE INTO data_versions (table_name, version) VALUES ('publications', 0), ('customers', 0)",
+    ),
+    Migration(
+        3, "subscription next run dates",
+        add_column("subscriptions", "next_run_date", "DATE NULL"),
+        # SubscriptionDAO.DUE_CONDITION range lookup
+        add_index("subscriptions", "idx_subscriptions_next_run", ["status", "next_run_date"]),
+        _backfill_next_run_dates,
+    ),
+    Migration(
+        4, "publication full-text index",
+        # PublicationDAO._fulltext_search (SEARCH_MODE = 'fulltext')
+        add_index("publications", "ft_publications_title_publisher", ["title", "publisher"], kind="FULLTEXT INDEX"),
+    ),
+    Migration(
+        5, "daily sales rollup",
+        rollup.CREATE_TABLE,
+        "DELETE FROM daily_sales",
+        rollup.rebuild_step,
+    ),
+    Migration(
+        6, "bill due date index",
+        # BillingDAO.get_invoice_batch due-date range
+        add_index("bills", "idx_bills_due_type", ["due_date", "bill_type", "status", "related_id"]),
+    ),
+    Migration(
+        7, "customer balance ledger",
+        ledger.CREATE_TABLE,
+        # CustomerLedger.apply_status_change oldest unpaid due date
+        add_index("bills", "idx_bills_customer_status_due", ["customer_id", "status", "due_date"]),
+        "DELETE FROM customer_balances",
+        ledger.rebuild_step,
+    ),
+    Migration(
+        8, "daily order counts",
+        rollup.CREATE_ORDERS_TABLE,
+        "DELETE FROM daily_orders",
+        rollup.rebuild_orders_step,
+    ),
+]
+
+
+def run_migrations(target=None):
+    """Applies every pending migration up to ``target``; returns the versions applied."""
+    applied = []
+    with Database.get_connection() as connection:
+        if connection is None:
+            return applied
+        cursor = connection.cursor()
+        try:
+            cursor.execute(VERSION_TABLE)
+            cursor.execute("SELECT version FROM schema_migrations")
+            done = {row[0] for row in cursor.fetchall()}
+
+            for migration in MIGRATIONS:
+                if migration.version in done or (target is not None and migration.version > target):
+                    continue
+                print(f"Applying migration {migration.version}: {migration.name}")
+                migration.apply(cursor)
+                cursor.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                               (migration.version, migration.name))
+                connection.commit()
+                applied.append(migration.version)
+        except Error as e:
+            print(f"Migration failed: '{e}'")
+        finally:
+            cursor.close()
+    return applied
+
+
+def current_version():
+    result = Database.execute_query("SELECT MAX(version) AS version FROM schema_migrations", fetch='one')
+    return result['version'] if result and result['version'] is not None else 0
+
+
+if __name__ == "__main__":
+    versions = run_migrations()
+    print(f"Applied {len(versions)} migration(s); schema is at version {current_version()}.")
@@ -0,0 +1,262 @@
+"""Set-based generation of the orders owed by due subscriptions.
+
+All due subscriptions and their items are read with one query. They are then
+turned into orders in batches of ``SUBSCRIPTION_BATCH_SIZE``. Each batch is a
+single transaction with a fixed number of statements: claim the subscriptions
+(advancing their ``next_run_date``), insert the orders, insert the items,
+decrement stock, insert the bills and update the balance ledger and sales
+rollup. When a batch fails it is retried one subscription at a time, so a
+single bad subscription is reported on its own instead of sinking its
+neighbours. Subscriptions without items get no order; their ``next_run_date``
+is simply moved on and they are counted in ``GenerationResult.empty``.
+
+Due subscriptions are split into disjoint customer partitions that run on their
+own worker threads, each with its own pooled connection and transactions. The
+partitions write disjoint subscriptions, orders, bills and balances, but their
+batches share stock, ``daily_sales``/``daily_orders`` and ``data_versions``
+rows. Those stay inside each batch's transaction so stock and the rollup are
+never behind the committed orders. Every batch updates the shared tables in
+the same sequence and locks their rows in key order (publication id, rollup
+key, table name), which keeps lock waits between workers short; a batch that
+still loses a deadlock to a worker or another client is run again, up to
+``DEADLOCK_ATTEMPTS`` times.
+
+``catch_up`` runs the generation once for every day since the earliest
+outstanding ``next_run_date``, so days nobody generated orders for are filled
+in with orders dated on the day they were owed.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from mysql.connector import Error, errorcode
+from .db_connector import Database
+from .cache import DataVersions
+from .dao import SubscriptionDAO, StockDAO
+from .schedule import next_run_after
+from .rollup import SalesRollup
+from .ledger import CustomerLedger
+from config import SUBSCRIPTION_BATCH_SIZE, SUBSCRIPTION_CATCH_UP_DAYS, SUBSCRIPTION_GENERATION_WORKERS
+
+ORDER_QUERY = "INSERT INTO orders (customer_id, order_date, total_amount, delivery_status, payment_status) VALUES (%s, %s, %s, 'Pending', 'Unpaid')"
+ITEM_QUERY = "INSERT INTO order_items (order_id, publication_id, quantity, price_per_unit) VALUES (%s, %s, %s, %s)"
+BILL_QUERY = "INSERT INTO bills (customer_id, bill_type, related_id, due_amount, due_date, status) VALUES (%s, 'Order', %s, %s, %s, 'Unpaid')"
+
+# A batch that still loses a lock wait to another client is simply run again.
+DEADLOCK_ATTEMPTS = 3
+
+
+class ClaimConflict(Error):
+    """Raised when some subscriptions in a batch were already generated by another run."""
+
+
+class GenerationResult:
+
+    def __init__(self):
+        self.due = 0
+        self.generated = 0
+        self.skipped = 0
+        self.empty = 0       # due subscriptions without items, advanced without an order
+        self.order_ids = []
+        self.failures = []   # (subscription_id, reason)
+        self.elapsed = 0.0   # seconds
+
+    @property
+    def failed(self):
+        return len(self.failures)
+
+    @property
+    def per_second(self):
+        """Subscriptions turned into orders per second of run time."""
+        return self.generated / self.elapsed if self.elapsed else 0.0
+
+    def merge(self, other):
+        self.due += other.due
+        self.generated += other.generated
+        self.skipped += other.skipped
+        self.empty += other.empty
+        self.order_ids.extend(other.order_ids)
+        self.failures.extend(other.failures)
+        self.elapsed += other.elapsed
+
+
+def group_due_rows(rows):
+    """Folds ``get_due_with_items`` rows into one dict per subscription, keeping their order."""
+    subscriptions = {}
+    for row in rows:
+        sub = subscriptions.get(row['subscription_id'])
+        if sub is None:
+            sub = subscriptions[row['subscription_id']] = {
+                'subscription_id': row['subscription_id'], 'customer_id': row['customer_id'], 'start_date': row['start_date'],
+                'end_date': row['end_date'], 'frequency': row['frequency'], 'items': []}
+        if row['publication_id'] is not None:
+            sub['items'].append({'pub_id': row['publication_id'], 'quantity': row['quantity'], 'price': row['price']})
+    return list(subscriptions.values())
+
+
+def _advance(tx, batch, run_date, generated=True):
+    """Moves the ``next_run_date`` of ``batch`` past ``run_date``; returns how many were still due.
+
+    ``generated`` also stamps ``last_generated_date``.
+    """
+    sub_ids = [sub['subscription_id'] for sub in batch]
+    next_runs = [next_run_after(sub['start_date'], sub['frequency'], run_date, sub['end_date']) for sub in batch]
+    cases = " ".join("WHEN %s THEN %s" for _ in batch)
+    placeholders = ", ".join(["%s"] * len(sub_ids))
+    stamp = "last_generated_date = %s, " if generated else ""
+    query = (f"UPDATE subscriptions SET {stamp}next_run_date = CASE subscription_id {cases} END "
+             f"WHERE subscription_id IN ({placeholders}) AND status = 'Active' AND next_run_date <= %s")
+    params = ([run_date] if generated else []) + [value for pair in zip(sub_ids, next_runs) for value in pair] \
+        + sub_ids + [run_date]
+    return tx.execute(query, params)
+
+
+def _skip_empty(result, subscriptions, run_date, batch_size):
+    """Advances due subscriptions that have no items, so they stop coming back every run."""
+    try:
+        with Database.transaction() as tx:
+            for start in range(0, len(subscriptions), batch_size):
+                _advance(tx, subscriptions[start:start + batch_size], run_date, generated=False)
+    except Error as e:
+        print(f"Advancing subscriptions without items failed and was rolled back: '{e}'")
+        result.failures.extend((sub['subscription_id'], "Subscription has no items") for sub in subscriptions)
+        return
+    result.empty += len(subscriptions)
+
+
+def _create_orders(tx, batch, run_date):
+    """Writes the orders for ``batch`` inside ``tx``; returns the new order ids in batch order."""
+    claimed = _advance(tx, batch, run_date)
+    if claimed != len(batch):
+        raise ClaimConflict(f"{len(batch) - claimed} subscription(s) were already generated for {run_date}")
+
+    totals = [sum(item['quantity'] * item['price'] for item in sub['items']) for sub in batch]
+    orders = tx.execute_many(ORDER_QUERY, [(sub['customer_id'], run_date, total) for sub, total in zip(batch, totals)],
+                             return_ids=True)
+    order_ids = orders.ids
+    tx.execute_many(ITEM_QUERY, [(order_id, item['pub_id'], item['quantity'], item['price'])
+                                 for order_id, sub in zip(order_ids, batch) for item in sub['items']])
+    bills = tx.execute_many(BILL_QUERY, [(sub['customer_id'], order_id, total, run_date)
+                                         for sub, order_id, total in zip(batch, order_ids, totals)],
+                            return_ids=True)
+    CustomerLedger.add_bills(tx, bills.ids)
+    # Rows shared with other batches last, each table locked in key order.
+    StockDAO.deduct_quantities(tx, [item for sub in batch for item in sub['items']])
+    SalesRollup.add_orders(tx, order_ids)
+    DataVersions.bump_all("orders", "stock", "bills")
+    return order_ids
+
+
+def _run_batch(batch, run_date):
+    for attempt in range(DEADLOCK_ATTEMPTS):
+        try:
+            with Database.transaction() as tx:
+                return _create_orders(tx, batch, run_date)
+        except Error as e:
+            if e.errno != errorcode.ER_LOCK_DEADLOCK or attempt == DEADLOCK_ATTEMPTS - 1:
+                raise
+
+
+def _generate_batch(batch, run_date):
+    result = GenerationResult()
+    try:
+        order_ids = _run_batch(batch, run_date)
+    except Error as e:
+        if len(batch) == 1:
+            if isinstance(e, ClaimConflict):
+                result.skipped += 1
+            else:
+                result.failures.append((batch[0]['subscription_id'], str(e)))
+            return result
+        for sub in batch:
+            result.merge(_generate_batch([sub], run_date))
+        return result
+
+    result.generated += len(batch)
+    result.order_ids.extend(order_ids)
+    return result
+
+
+def _partition(subscriptions, count):
+    """Splits subscriptions into at most ``count`` groups with no customer in two groups."""
+    partitions = [[] for _ in range(count)]
+    for sub in subscriptions:
+        partitions[sub['customer_id'] % count].append(sub)
+    return [partition for partition in partitions if partition]
+
+
+def _generate_partition(subscriptions, run_date, batch_size, cancel_event):
+    result = GenerationResult()
+    for start in range(0, len(subscriptions), batch_size):
+        if cancel_event is not None and cancel_event.is_set():
+            break
+        result.merge(_generate_batch(subscriptions[start:start + batch_size], run_date))
+    return result
+
+
+def generate_due_orders(run_date=None, batch_size=SUBSCRIPTION_BATCH_SIZE, cancel_event=None, subscriptions=None,
+                        workers=SUBSCRIPTION_GENERATION_WORKERS):
+    """Creates the orders owed on ``run_date`` (default today) by every due subscription.
+
+    ``subscriptions`` may pass already-grouped due subscriptions instead of
+    reading them. Up to ``workers`` customer partitions are generated at once.
+    Stops between batches once ``cancel_event`` is set. Returns a
+    ``GenerationResult``, or ``None`` if the due subscriptions couldn't be read.
+    """
+    started = time.perf_counter()
+    run_date = run_date or date.today()
+    if subscriptions is None:
+        rows = SubscriptionDAO.get_due_with_items(run_date)
+        if rows is None:
+            return None
+        subscriptions = group_due_rows(rows)
+
+    result = GenerationResult()
+    result.due = len(subscriptions)
+    ready = [sub for sub in subscriptions if sub['items']]
+    empty = [sub for sub in subscriptions if not sub['items']]
+    if empty:
+        _skip_empty(result, empty, run_date, batch_size)
+
+    partitions = _partition(ready, max(1, workers))
+    if len(partitions) == 1:
+        result.merge(_generate_partition(partitions[0], run_date, batch_size, cancel_event))
+    elif partitions:
+        with ThreadPoolExecutor(max_workers=len(partitions), thread_name_prefix="subscription-gen") as executor:
+            futures = [executor.submit(_generate_partition, partition, run_date, batch_size, cancel_event)
+                       for partition in partitions]
+            for future in futures:
+                partial = future.result()
+                partial.elapsed = 0.0
+                result.merge(partial)
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+def generate_range(first_date, last_date, batch_size=SUBSCRIPTION_BATCH_SIZE, cancel_event=None,
+                   workers=SUBSCRIPTION_GENERATION_WORKERS):
+    """Runs ``generate_due_orders`` for each day from ``first_date`` to ``last_date`` in order."""
+    total = GenerationResult()
+    day = first_date
+    while day <= last_date:
+        if cancel_event is not None and cancel_event.is_set():
+            break
+        result = generate_due_orders(day, batch_size, cancel_event, workers=workers)
+        if result is None:
+            return None if day == first_date else total
+        total.merge(result)
+        day += timedelta(days=1)
+    return total
+
+
+def catch_up(until=None, max_days=SUBSCRIPTION_CATCH_UP_DAYS, batch_size=SUBSCRIPTION_BATCH_SIZE, cancel_event=None,
+             workers=SUBSCRIPTION_GENERATION_WORKERS):
+    """Generates every run owed up to ``until`` (default today), oldest first.
+
+    Looks back at most ``max_days``; anything older is folded into the first
+    day of the window.
+    """
+    until = until or date.today()
+    earliest = SubscriptionDAO.get_earliest_next_run()
+    if earliest is None or earliest > until:
+        return GenerationResult()
+    return generate_range(max(earliest, until - timedelta(days=max_days - 1)), until, batch_size, cancel_event, workers)
@@ -0,0 +1,142 @@
+import re
+from bisect import bisect_left
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from config import SLOW_QUERY_THRESHOLD_MS, SLOW_QUERY_LOG_SIZE
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+_VALUE_GROUPS = re.compile(r"(\([^()]*\))(?:\s*,\s*\([^()]*\))+")
+_CASE_ARMS = re.compile(r"(WHEN \? THEN \?)(?: WHEN \? THEN \?)+", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+# Histogram bucket upper bounds in milliseconds: 0.1 ms up to ~2 minutes, 20% apart.
+_BUCKET_BOUNDS = [0.1 * 1.2 ** i for i in range(78)]
+
+
+@lru_cache(maxsize=1024)
+def fingerprint(query):
+    """Normalises a statement so every call of the same query shares one key.
+
+    Literals become ``?`` and ``IN (...)`` lists, multi-row VALUES groups or
+    ``CASE ... WHEN ? THEN ?`` arms of any length collapse to a single element.
+    """
+    text = _WHITESPACE.sub(" ", query).strip().rstrip(";")
+    text = _STRING_LITERAL.sub("?", text)
+    text = _NUMBER_LITERAL.sub("?", text)
+    text = text.replace("%s", "?")
+    text = _PLACEHOLDER_LIST.sub("?", text)
+    text = _VALUE_GROUPS.sub(r"\1", text)
+    text = _CASE_ARMS.sub(r"\1", text)
+    return text
+
+
+class _StatementStats:
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(_BUCKET_BOUNDS) + 1)
+
+    def add(self, elapsed_ms, rows, error):
+        self.calls += 1
+        self.errors += 1 if error else 0
+        self.rows += rows or 0
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.buckets[bisect_left(_BUCKET_BOUNDS, elapsed_ms)] += 1
+
+    def percentile(self, fraction):
+        """Upper bound of the histogram bucket holding the given fraction of calls."""
+        if not self.calls:
+            return 0.0
+        target = fraction * self.calls
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= target:
+                bound = _BUCKET_BOUNDS[index] if index < len(_BUCKET_BOUNDS) else self.max_ms
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def snapshot(self, statement):
+        return {
+            'statement': statement,
+            'calls': self.calls,
+            'errors': self.errors,
+            'rows': self.rows,
+            'total_ms': round(self.total_ms, 3),
+            'avg_ms': round(self.total_ms / self.calls, 3) if self.calls else 0.0,
+            'p50_ms': round(self.percentile(0.50), 3),
+            'p95_ms': round(self.percentile(0.95), 3),
+            'p99_ms': round(self.percentile(0.99), 3),
+            'max_ms': round(self.max_ms, 3),
+        }
+
+
+class QueryStats:
+    """Process-wide latency and row counters for every statement ``Database`` runs."""
+
+    def __init__(self, slow_threshold_ms=SLOW_QUERY_THRESHOLD_MS, slow_log_size=SLOW_QUERY_LOG_SIZE):
+        self.slow_threshold_ms = slow_threshold_ms
+        self._lock = threading.Lock()
+        self._statements = {}
+        self._slow_log = deque(maxlen=slow_log_size)
+
+    def record(self, query, elapsed_ms, rows=0, error=False, params=None):
+        key = fingerprint(query)
+        with self._lock:
+            stats = self._statements.get(key)
+            if stats is None:
+                stats = self._statements[key] = _StatementStats()
+            stats.add(elapsed_ms, rows, error)
+            slow = self.slow_threshold_ms is not None and elapsed_ms >= self.slow_threshold_ms
+            if slow:
+                self._slow_log.append({
+                    'at': time.strftime('%Y-%m-%d %H:%M:%S'),
+                    'elapsed_ms': round(elapsed_ms, 3),
+                    'statement': key,
+                    'params': repr(params)[:200] if params is not None else None,
+                    'rows': rows,
+                })
+        if slow:
+            print(f"Slow query ({elapsed_ms:.1f} ms): {key}")
+
+    def snapshot(self, order_by='total_ms'):
+        """Returns per-statement stats as a list of dicts, heaviest first."""
+        with self._lock:
+            rows = [stats.snapshot(key) for key, stats in self._statements.items()]
+        return sorted(rows, key=lambda row: row[order_by], reverse=True)
+
+    def slow_queries(self):
+        with self._lock:
+            return list(self._slow_log)
+
+    def reset(self):
+        with self._lock:
+            self._statements.clear()
+            self._slow_log.clear()
+
+    def report(self, limit=25):
+        """Formats the heaviest statements as a plain-text table."""
+        lines = [f"{'Calls':>8} {'Total ms':>10} {'p50':>8} {'p95':>8} {'p99':>8} {'Rows':>9}  Statement"]
+        for row in self.snapshot()[:limit]:
+            statement = row['statement'] if len(row['statement']) <= 100 else row['statement'][:97] + "..."
+            lines.append(f"{row['calls']:>8} {row['total_ms']:>10.1f} {row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} "
+                         f"{row['p99_ms']:>8.2f} {row['rows']:>9}  {statement}")
+        slow = self.slow_queries()
+        if slow:
+            lines.append("")
+            lines.append(f"Slow queries (>= {self.slow_threshold_ms} ms, most recent last):")
+            for entry in slow[-limit:]:
+                lines.append(f"  {entry['at']} {entry['elapsed_ms']:>9.1f} ms  {entry['statement'][:100]}")
+        return "\n".join(lines)
+
+
+QUERY_STATS = QueryStats()
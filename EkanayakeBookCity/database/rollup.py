@@ -0,0 +1,119 @@
+"""Daily sales rollup: quantity, revenue and order count per day, publication and customer type.
+
+``daily_sales`` and ``daily_orders`` are kept current inside the transactions
+that create orders (``OrderDAO.create_order`` and subscription generation), so
+summaries never have to re-join the order tables. ``daily_sales.order_count``
+counts the orders containing the publication, so an order with several
+publications counts once for each; ``daily_orders`` holds the distinct order
+count per day and customer type for totals that aren't split by publication.
+
+Rows are keyed by the customer's type when the order was placed. Changing a
+customer's type (``CustomerDAO.update``) leaves their past sales where they
+are, but a rebuild re-reads ``customers`` and so files the rebuilt range under
+the current types.
+
+Rebuild it, e.g. after a backfill or manual data fixes, from the
+``EkanayakeBookCity`` folder with ``python -m database.rollup [start end]``.
+"""
+import sys
+from mysql.connector import Error
+from .db_connector import Database
+
+CREATE_TABLE = """
+    CREATE TABLE IF NOT EXISTS daily_sales (
+        sales_date DATE NOT NULL,
+        publication_id INT NOT NULL,
+        customer_type ENUM('Prepaid', 'Postpaid') NOT NULL,
+        quantity BIGINT NOT NULL DEFAULT 0,
+        revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+        order_count INT NOT NULL DEFAULT 0,
+        PRIMARY KEY (sales_date, publication_id, customer_type)
+    )
+"""
+
+CREATE_ORDERS_TABLE = """
+    CREATE TABLE IF NOT EXISTS daily_orders (
+        sales_date DATE NOT NULL,
+        customer_type ENUM('Prepaid', 'Postpaid') NOT NULL,
+        order_count INT NOT NULL DEFAULT 0,
+        PRIMARY KEY (sales_date, customer_type)
+    )
+"""
+
+# Aggregates the selected orders; {where} narrows the orders read. Rows are upserted in key order so
+# concurrent order transactions lock them in the same order.
+_AGGREGATE = """
+    INSERT INTO daily_sales (sales_date, publication_id, customer_type, quantity, revenue, order_count)
+    SELECT o.order_date, oi.publication_id, c.customer_type, SUM(oi.quantity), SUM(oi.quantity * oi.price_per_unit),
+           COUNT(DISTINCT o.order_id)
+    FROM orders o
+    JOIN order_items oi ON oi.order_id = o.order_id
+    JOIN customers c ON c.customer_id = o.customer_id
+    WHERE {where}
+    GROUP BY o.order_date, oi.publication_id, c.customer_type
+    ORDER BY o.order_date, oi.publication_id, c.customer_type
+    ON DUPLICATE KEY UPDATE quantity = quantity + VALUES(quantity), revenue = revenue + VALUES(revenue),
+                            order_count = order_count + VALUES(order_count)
+"""
+
+# Counts the selected orders once each; {where} narrows the orders read.
+_AGGREGATE_ORDERS = """
+    INSERT INTO daily_orders (sales_date, customer_type, order_count)
+    SELECT o.order_date, c.customer_type, COUNT(*)
+    FROM orders o
+    JOIN customers c ON c.customer_id = o.customer_id
+    WHERE {where}
+    GROUP BY o.order_date, c.customer_type
+    ORDER BY o.order_date, c.customer_type
+    ON DUPLICATE KEY UPDATE order_count = order_count + VALUES(order_count)
+"""
+
+
+class SalesRollup:
+
+    @staticmethod
+    def add_orders(tx, order_ids):
+        """Folds freshly created orders into the rollup inside ``tx``; two statements for any number of orders."""
+        if not order_ids:
+            return 0
+        where = f"o.order_id IN ({', '.join(['%s'] * len(order_ids))})"
+        tx.execute(_AGGREGATE_ORDERS.format(where=where), list(order_ids))
+        return tx.execute(_AGGREGATE.format(where=where), list(order_ids))
+
+    @staticmethod
+    def rebuild(start_date=None, end_date=None):
+        """Recomputes the rollup for a date range (everything by default); returns ``False`` on failure."""
+        if start_date is None or end_date is None:
+            delete, where, params = "DELETE FROM {table}", "1 = 1", ()
+        else:
+            delete = "DELETE FROM {table} WHERE sales_date BETWEEN %s AND %s"
+            where, params = "o.order_date BETWEEN %s AND %s", (start_date, end_date)
+        try:
+            with Database.transaction() as tx:
+                tx.execute(delete.format(table="daily_sales"), params or None)
+                tx.execute(delete.format(table="daily_orders"), params or None)
+                tx.execute(_AGGREGATE.format(where=where), params or None)
+                tx.execute(_AGGREGATE_ORDERS.format(where=where), params or None)
+        except Error as e:
+            print(f"Sales rollup rebuild failed and was rolled back: '{e}'")
+            return False
+        return True
+
+
+def rebuild_step(cursor):
+    """Migration step that fills an empty rollup from all existing orders."""
+    cursor.execute(_AGGREGATE.format(where="1 = 1"))
+
+
+def rebuild_orders_step(cursor):
+    """Migration step that fills an empty ``daily_orders`` from all existing orders."""
+    cursor.execute(_AGGREGATE_ORDERS.format(where="1 = 1"))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3:
+        ok = SalesRollup.rebuild(sys.argv[1], sys.argv[2])
+    else:
+        ok = SalesRollup.rebuild()
+    print("Sales rollup rebuilt." if ok else "Sales rollup rebuild failed.")
+    Database.close_connection()
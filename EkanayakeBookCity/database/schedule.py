@@ -0,0 +1,35 @@
+"""Run dates for subscription schedules.
+
+A subscription runs on its start date and then every day, every seven days or
+on the same day of each month. Monthly subscriptions that start on the 29th to
+31st run on the last day of shorter months and go back to their own day after.
+"""
+import calendar
+from datetime import timedelta
+
+
+def _month_offset(start_date, months):
+    year, month = divmod(start_date.month - 1 + months, 12)
+    year += start_date.year
+    month += 1
+    return start_date.replace(year=year, month=month, day=min(start_date.day, calendar.monthrange(year, month)[1]))
+
+
+def next_run_on_or_after(start_date, frequency, day, end_date=None):
+    """First scheduled run on or after ``day``, or ``None`` once past ``end_date``."""
+    day = max(day, start_date)
+    if frequency == 'Daily':
+        run = day
+    elif frequency == 'Weekly':
+        run = start_date + timedelta(days=-(-(day - start_date).days // 7) * 7)
+    else:
+        months = (day.year - start_date.year) * 12 + day.month - start_date.month
+        run = _month_offset(start_date, months)
+        if run < day:
+            run = _month_offset(start_date, months + 1)
+    return run if end_date is None or run <= end_date else None
+
+
+def next_run_after(start_date, frequency, day, end_date=None):
+    """First scheduled run strictly after ``day``."""
+    return next_run_on_or_after(start_date, frequency, day + timedelta(days=1), end_date)
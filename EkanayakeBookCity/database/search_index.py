@@ -0,0 +1,176 @@
+"""In-process search over publication titles and publishers.
+
+Text is lower-cased and split into words. Words of three or more characters
+are found through a trigram posting index, which gives substring matching the
+way ``LIKE '%x%'`` did but without scanning every row. Shorter words match word
+prefixes through a sorted word list. Results are ranked: exact title, title
+prefix, title word prefix, title substring, then publisher matches.
+"""
+import heapq
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+
+
+def normalize(text):
+    """Lower-cases ``text`` and turns punctuation, symbols and spacing into single spaces.
+
+    Letters, digits and combining marks of any script are kept, so Sinhala and
+    Tamil titles split into words the same way English ones do.
+    """
+    chars = [" " if unicodedata.category(char)[0] in "PSZC" else char for char in (text or "").lower()]
+    return " ".join("".join(chars).split())
+
+
+def trigrams(word):
+    return {word[i:i + 3] for i in range(len(word) - 2)}
+
+
+class _Document:
+    __slots__ = ("row", "title", "publisher", "words")
+
+    def __init__(self, row):
+        self.row = row
+        self.title = normalize(row['title'])
+        self.publisher = normalize(row['publisher'])
+        self.words = set(self.title.split()) | set(self.publisher.split())
+
+
+class SearchIndex:
+    """Trigram and word-prefix index kept in step with a ``ReferenceCache``.
+
+    The index follows the cache's version: local writes patch it when it was
+    current right before the write, and any other change rebuilds it from the
+    cached rows on the next search.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+        self._lock = threading.Lock()
+        self._version = None
+        self._docs = {}
+        self._grams = {}
+        self._words = []   # sorted (word, key) pairs for prefix lookups
+        self._by_title = None   # rows in title order, answers empty queries
+
+    def build(self):
+        """Loads the index from the cache; returns ``False`` if the rows can't be read."""
+        with self._lock:
+            return self._ensure_current()
+
+    def search(self, query, limit=50):
+        """Best ``limit`` rows for ``query``, or ``None`` if the index can't be loaded."""
+        with self._lock:
+            if not self._ensure_current():
+                return None
+            text = normalize(query)
+            if not text:
+                if self._by_title is None:
+                    self._by_title = [doc.row for doc in sorted(self._docs.values(), key=lambda doc: doc.title)]
+                return self._by_title[:limit]
+
+            tokens = text.split()
+            candidates = None
+            for token in sorted(tokens, key=len, reverse=True):
+                keys = self._candidates(token)
+                candidates = keys if candidates is None else candidates & keys
+                if not candidates:
+                    return []
+
+            matches = [self._docs[key] for key in candidates if self._matches(self._docs[key], text, tokens)]
+            return [doc.row for doc in heapq.nsmallest(limit, matches, key=lambda doc: self._rank(doc, text))]
+
+    def apply_insert(self, rows, version):
+        self._patch(version, lambda: [self._add(row) for row in rows])
+
+    def apply_update(self, row, version):
+        def change():
+            self._remove(row[self.cache.key])
+            self._add(row)
+        self._patch(version, change)
+
+    def apply_delete(self, key_value, version):
+        self._patch(version, lambda: self._remove(key_value))
+
+    def _ensure_current(self):
+        rows = self.cache.get()
+        if rows is None:
+            return self._version is not None
+        if self.cache.version != self._version:
+            self._docs, self._grams, self._words = {}, {}, []
+            for row in rows:
+                self._add(row, sort=False)
+            self._words.sort()
+            self._version = self.cache.version
+            self._by_title = None
+        return True
+
+    def _patch(self, version, change):
+        with self._lock:
+            if self._version is None:
+                return
+            if version is None or version != self._version + 1:
+                self._version = None
+                return
+            change()
+            self._version = version
+            self._by_title = None
+
+    def _add(self, row, sort=True):
+        key = row[self.cache.key]
+        doc = self._docs[key] = _Document(row)
+        for word in doc.words:
+            for gram in trigrams(word):
+                self._grams.setdefault(gram, set()).add(key)
+            if sort:
+                insort(self._words, (word, key))
+            else:
+                self._words.append((word, key))
+
+    def _remove(self, key):
+        doc = self._docs.pop(key, None)
+        if doc is None:
+            return
+        for word in doc.words:
+            for gram in trigrams(word):
+                postings = self._grams.get(gram)
+                if postings is not None:
+                    postings.discard(key)
+                    if not postings:
+                        del self._grams[gram]
+            index = bisect_left(self._words, (word, key))
+            if index < len(self._words) and self._words[index] == (word, key):
+                del self._words[index]
+
+    def _candidates(self, token):
+        if len(token) >= 3:
+            postings = sorted((self._grams.get(gram, set()) for gram in trigrams(token)), key=len)
+            return set.intersection(*postings) if postings[0] else set()
+        keys = set()
+        index = bisect_left(self._words, (token,))
+        while index < len(self._words) and self._words[index][0].startswith(token):
+            keys.add(self._words[index][1])
+            index += 1
+        return keys
+
+    @staticmethod
+    def _matches(doc, text, tokens):
+        if text in doc.title or text in doc.publisher:
+            return True
+        return all(token in doc.title or token in doc.publisher for token in tokens)
+
+    @staticmethod
+    def _rank(doc, text):
+        if doc.title == text:
+            tier = 0
+        elif doc.title.startswith(text):
+            tier = 1
+        elif f" {text}" in f" {doc.title}":
+            tier = 2
+        elif text in doc.title:
+            tier = 3
+        elif text in doc.publisher:
+            tier = 4
+        else:
+            tier = 5
+        return tier, len(doc.title), doc.title
@@ -0,0 +1,170 @@
+"""Month-end statement run: one statement file per customer for a period.
+
+``ReportDAO.stream_statement_run`` returns every customer of a type with their
+bills for the period, opening balance included, in one customer-ordered query
+read through an unbuffered cursor. The rows are split by customer as they
+arrive: a statement file is opened at its customer's first row, written line
+by line with a running balance and closed when the next customer starts. Only
+the current chunk and one open file are held at a time, so a run costs one
+query whatever the number of customers and is otherwise bound by the disk.
+
+Bills carry a status but no payment date, so a statement charges every bill
+and credits the paid ones on the same line; the balance starts from the bills
+still unpaid from before the period and moves by the unpaid amounts.
+"""
+import os
+import time
+from decimal import Decimal
+from .dao import ReportDAO
+from .invoice_render import RULE, LINE, compile_part
+from config import STATEMENTS_DIR, STREAM_CHUNK_SIZE
+
+STATEMENT_COLUMNS = f"{'Due Date':<10} {'Bill #':>7} {'Type':<13} {'Charges':>10} {'Paid':>10} {'Balance':>12}"
+
+STATEMENT_HEADER = f"""
+{RULE}
+                         Ekanayake Book City
+                         CUSTOMER STATEMENT
+{RULE}
+
+Customer:  {{name}} (#{{customer_id}})
+Address:   {{address}}
+Contact:   {{contact_no}}
+Period:    {{start_date}} to {{end_date}}
+
+{LINE}
+{STATEMENT_COLUMNS}
+{LINE}
+{'Opening balance':<54} {{opening_balance:>12.2f}}
+"""
+STATEMENT_ROW = "{due_date:<10} {bill_id:>7} {bill_type:<13} {charge:>10.2f} {paid:>10.2f} {balance:>12.2f}\n"
+STATEMENT_FOOTER = f"""{LINE}
+{'Totals':<32} {{charges:>10.2f}} {{paid:>10.2f}}
+{'Closing balance':<54} {{balance:>12.2f}}
+{RULE}
+"""
+
+_HEADER = compile_part(STATEMENT_HEADER)
+_ROW = compile_part(STATEMENT_ROW)
+_FOOTER = compile_part(STATEMENT_FOOTER)
+_ZERO = Decimal('0.00')
+
+
+class StatementRunResult:
+
+    def __init__(self):
+        self.customers = 0
+        self.written = 0
+        self.skipped = 0            # customers with nothing billed and nothing owed
+        self.bills = 0
+        self.failures = []          # (customer_id, reason)
+        self.cancelled = False
+        self.elapsed = 0.0          # seconds
+
+    @property
+    def failed(self):
+        return len(self.failures)
+
+    @property
+    def per_second(self):
+        """Statements written per second of run time."""
+        return self.written / self.elapsed if self.elapsed else 0.0
+
+
+def statement_filename(customer_id, start_date, end_date):
+    return f"EBC-Statement-{customer_id}-{start_date}-to-{end_date}.txt"
+
+
+class _Statement:
+    """One customer's statement file, written as the customer's rows stream past."""
+
+    def __init__(self, path, first_row, start_date, end_date):
+        self.path = path
+        self.balance = first_row['opening_balance'] or _ZERO
+        self.charges = _ZERO
+        self.paid = _ZERO
+        self.file = open(path, "w", encoding="utf-8")
+        self.file.write(_HEADER(dict(first_row, start_date=start_date, end_date=end_date,
+                                         opening_balance=self.balance)))
+
+    def add(self, bill):
+        charge = bill['due_amount']
+        paid = charge if bill['status'] == 'Paid' else _ZERO
+        self.charges += charge
+        self.paid += paid
+        self.balance += charge - paid
+        self.file.write(_ROW(dict(bill, due_date=str(bill['due_date']), charge=charge, paid=paid, balance=self.balance)))
+
+    def close(self):
+        self.file.write(_FOOTER({'charges': self.charges, 'paid': self.paid, 'balance': self.balance}))
+        self.file.close()
+
+    def discard(self):
+        self.file.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def generate_statements(start_date, end_date, customer_type='Postpaid', directory=STATEMENTS_DIR,
+                        chunk_size=STREAM_CHUNK_SIZE, progress=None, cancel_event=None):
+    """Writes a statement for every ``customer_type`` customer billed or owing for the period.
+
+    ``progress(written)`` is called after each chunk with the statements
+    finished so far. Stops between chunks once ``cancel_event`` is set; the
+    statement being written then is removed. Returns a ``StatementRunResult``;
+    read errors are raised.
+    """
+    started = time.perf_counter()
+    os.makedirs(directory, exist_ok=True)
+    result = StatementRunResult()
+    stream = ReportDAO.stream_statement_run(start_date, end_date, customer_type, chunk_size)
+    current_id, statement = None, None
+    try:
+        for chunk in stream:
+            for row in chunk:
+                if row['customer_id'] != current_id:
+                    if statement is not None:
+                        statement = _finish(result, current_id, statement)
+                    current_id = row['customer_id']
+                    result.customers += 1
+                    if row['bill_id'] is None and not row['opening_balance']:
+                        result.skipped += 1
+                        continue
+                    path = os.path.join(directory, statement_filename(current_id, start_date, end_date))
+                    try:
+                        statement = _Statement(path, row, start_date, end_date)
+                    except OSError as e:
+                        result.failures.append((current_id, str(e)))
+                        continue
+                if statement is None or row['bill_id'] is None:
+                    continue
+                try:
+                    statement.add(row)
+                    result.bills += 1
+                except OSError as e:
+                    result.failures.append((current_id, str(e)))
+                    statement.discard()
+                    statement = None
+            if progress:
+                progress(result.written)
+            if cancel_event is not None and cancel_event.is_set():
+                result.cancelled = True
+                break
+        if statement is not None and not result.cancelled:
+            statement = _finish(result, current_id, statement)
+    finally:
+        stream.close()
+        if statement is not None:
+            statement.discard()
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+def _finish(result, customer_id, statement):
+    try:
+        statement.close()
+        result.written += 1
+    except OSError as e:
+        result.failures.append((customer_id, str(e)))
+        statement.discard()
+    return None
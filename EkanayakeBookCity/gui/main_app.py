@@ -1,5 +1,6 @@
 import tkinter as tk
-from tkinter import ttk, font
+from tkinter import ttk, font, scrolledtext
+from database.db_connector import Database
 from .pages import (dashboard_page, publications_page, customers_page, orders_page, manage_orders_page,
                     advertisements_page, stock_page, billing_page, reports_page, subscriptions_page)
 
@@ -63,6 +64,9 @@ class EBCManagementSystem(tk.Tk):
                                command=lambda pc=page_class: self.show_page(pc))
             button.pack(fill='x', padx=10, pady=5, ipady=5)
 
+        # Query stats (F12)
+        self.bind('<F12>', lambda event: self.show_query_stats())
+
         # Initial Page Display
         self.show_page(dashboard_page.DashboardPage)
 
@@ -73,6 +77,31 @@ class EBCManagementSystem(tk.Tk):
         page = page_class(self.content_area, self)
         page.pack(fill="both", expand=True, padx=10, pady=10)
 
+    def show_query_stats(self):
+        window = tk.Toplevel(self)
+        window.title("Query Statistics")
+        window.geometry("1000x500")
+
+        text = scrolledtext.ScrolledText(window, wrap=tk.NONE, font=("Courier", 9))
+        text.pack(fill='both', expand=True)
+
+        def refresh():
+            stats = Database.pool_stats()
+            text.delete("1.0", tk.END)
+            text.insert(tk.END, f"Pool: {stats['in_use']} in use, {stats['idle']} idle of {stats['size']} "
+                                f"(checkouts {stats['checkouts']}, waits {stats['waits']}, timeouts {stats['timeouts']})\n")
+            cache = Database.statement_cache_stats()
+            text.insert(tk.END, f"Prepared statements: {cache['hits']} hits, {cache['misses']} misses, "
+                                f"{cache['evictions']} evictions, {cache['skipped']} unprepared "
+                                f"(hit ratio {cache['hit_ratio']:.1%})\n\n")
+            text.insert(tk.END, Database.query_stats_report())
+
+        button_frame = ttk.Frame(window)
+        button_frame.pack(fill='x', pady=5)
+        ttk.Button(button_frame, text="Refresh", command=refresh).pack(side='left', padx=5)
+        ttk.Button(button_frame, text="Reset", command=lambda: (Database.reset_query_stats(), refresh())).pack(side='left', padx=5)
+        refresh()
+
     def show_status_message(self, message, duration_ms=4000):
         self.status_bar.config(text=message, fg='black')
         self.status_bar.after(duration_ms, self.clear_status_message)
@@ -1,6 +1,8 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
 from database.dao import CustomerDAO, PublicationDAO, AdvertisementDAO
+from gui.widgets.treeview_pager import TreeviewPager
+from gui.widgets.background_task import load_choices
 from config import AD_RATE_PER_WORD
 from datetime import date
 
@@ -18,16 +20,15 @@ class AdvertisementsPage(tk.Frame):
         entry_frame = ttk.LabelFrame(self, text="Advertisement Details")
         entry_frame.pack(fill="x", padx=10, pady=10)
 
-        customers = CustomerDAO.get_all()
-        customer_choices = [f"{c['customer_id']} - {c['name']}" for c in customers] if customers else []
-        publications = PublicationDAO.get_all()
-        pub_choices = [f"{p['publication_id']} - {p['title']}" for p in publications] if publications else []
-        
         ttk.Label(entry_frame, text="Customer:").grid(row=0, column=0, padx=5, pady=5, sticky='w')
-        ttk.Combobox(entry_frame, textvariable=self.customer_id_var, values=customer_choices, width=30).grid(row=0, column=1)
+        customer_combo = ttk.Combobox(entry_frame, textvariable=self.customer_id_var, values=[], width=30)
+        customer_combo.grid(row=0, column=1)
+        load_choices(customer_combo, CustomerDAO.get_all, 'customer_id', 'name')
         
         ttk.Label(entry_frame, text="Publication:").grid(row=0, column=2, padx=5, pady=5, sticky='w')
-        ttk.Combobox(entry_frame, textvariable=self.publication_id_var, values=pub_choices, width=30).grid(row=0, column=3)
+        pub_combo = ttk.Combobox(entry_frame, textvariable=self.publication_id_var, values=[], width=30)
+        pub_combo.grid(row=0, column=3)
+        load_choices(pub_combo, PublicationDAO.get_all, 'publication_id', 'title')
         
         ttk.Label(entry_frame, text="Publication Date:").grid(row=1, column=0, padx=5, pady=5, sticky='w')
         ttk.Entry(entry_frame, textvariable=self.publication_date_var).grid(row=1, column=1)
@@ -52,20 +53,20 @@ class AdvertisementsPage(tk.Frame):
         self.tree.heading("publication", text="Publication")
         self.tree.heading("date", text="Date")
         self.tree.heading("cost", text="Cost")
+        scrollbar = ttk.Scrollbar(list_frame, orient='vertical')
+        scrollbar.pack(side='right', fill='y')
         self.tree.pack(fill="both", expand=True)
+
+        self.pager = TreeviewPager(self.tree, scrollbar,
+                                   fetch_page=lambda after, limit: AdvertisementDAO.get_all_with_details(after, limit),
+                                   to_values=lambda ad: (ad['ad_id'], ad['customer_name'], ad['publication_title'],
+                                                         ad['publication_date'], f"{ad['cost']:.2f}"),
+                                   key=lambda ad: ad['ad_id'])
         
         self.load_ads()
 
     def load_ads(self):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        ads = AdvertisementDAO.get_all_with_details()
-        if ads:
-            for ad in ads:
-                self.tree.insert('', 'end', values=(
-                    ad['ad_id'], ad['customer_name'], ad['publication_title'], 
-                    ad['publication_date'], f"{ad['cost']:.2f}"
-                ))
+        self.pager.reset()
 
     def add_ad(self):
         cust_selection = self.customer_id_var.get()
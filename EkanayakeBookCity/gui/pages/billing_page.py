@@ -1,15 +1,21 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
+from tkcalendar import DateEntry
 from database.dao import BillingDAO
+from database.invoice_render import write_invoice, invoice_filename
+from database.invoicing import generate_invoices
+from gui.widgets.treeview_pager import TreeviewPager
+from gui.widgets.background_task import run_in_background, LoadingIndicator
+from config import INVOICES_DIR
 import os
-from datetime import datetime
+from datetime import date
 
 class BillingPage(tk.Frame):
     def __init__(self, parent, controller):
         super().__init__(parent)
         self.controller = controller
 
-        self.invoices_dir = "Invoices"
+        self.invoices_dir = INVOICES_DIR
         os.makedirs(self.invoices_dir, exist_ok=True)
         
         title_label = ttk.Label(self, text="Billing Records", font=("Arial", 18, "bold"))
@@ -26,11 +32,34 @@ class BillingPage(tk.Frame):
                                         command=self.mark_as_paid, state='disabled')
         self.mark_paid_btn.pack(side='right')
 
+        self.count_label = ttk.Label(button_frame, text="")
+        self.count_label.pack(side='left')
+
+        batch_frame = ttk.LabelFrame(self, text="Batch Invoices")
+        batch_frame.pack(fill='x', padx=10, pady=5)
+        ttk.Label(batch_frame, text="Due From:").grid(row=0, column=0, padx=5, pady=5)
+        self.batch_start_entry = DateEntry(batch_frame, date_pattern='y-mm-dd')
+        self.batch_start_entry.set_date(date.today().replace(day=1))
+        self.batch_start_entry.grid(row=0, column=1, padx=5, pady=5)
+        ttk.Label(batch_frame, text="To:").grid(row=0, column=2, padx=5, pady=5)
+        self.batch_end_entry = DateEntry(batch_frame, date_pattern='y-mm-dd')
+        self.batch_end_entry.grid(row=0, column=3, padx=5, pady=5)
+        ttk.Label(batch_frame, text="Status:").grid(row=0, column=4, padx=5, pady=5)
+        self.batch_status_combo = ttk.Combobox(batch_frame, values=["All", "Unpaid", "Paid"], state='readonly', width=10)
+        self.batch_status_combo.current(0)
+        self.batch_status_combo.grid(row=0, column=5, padx=5, pady=5)
+        self.batch_spool_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(batch_frame, text="Single print file", variable=self.batch_spool_var).grid(row=0, column=6, padx=5, pady=5)
+        self.batch_invoice_btn = ttk.Button(batch_frame, text="Generate Invoices", command=self.generate_batch_invoices)
+        self.batch_invoice_btn.grid(row=0, column=7, padx=10, pady=5)
+        self.batch_task = None
+        self.batch_indicator = LoadingIndicator(self, on_cancel=self.cancel_batch_invoices)
+
         list_frame = ttk.Frame(self)
         list_frame.pack(fill="both", expand=True, padx=10, pady=10)
 
         columns = ("bill_id", "customer", "type", "related_id", "amount", "due_date", "status")
-        self.tree = ttk.Treeview(list_frame, columns=columns, show='headings')
+        self.tree = ttk.Treeview(list_frame, columns=columns, show='headings', selectmode='extended')
         
         self.tree.heading("bill_id", text="Bill ID")
         self.tree.heading("customer", text="Customer Name")
@@ -43,167 +72,161 @@ class BillingPage(tk.Frame):
         self.tree.column("bill_id", width=60, anchor='center')
         self.tree.column("amount", anchor='e')
         
+        scrollbar = ttk.Scrollbar(list_frame, orient='vertical')
+        scrollbar.pack(side='right', fill='y')
         self.tree.pack(fill="both", expand=True)
         self.tree.bind('<<TreeviewSelect>>', self.on_item_select)
+
+        self.pager = TreeviewPager(self.tree, scrollbar,
+                                   fetch_page=lambda after, limit: BillingDAO.get_all_with_details(after, limit),
+                                   to_values=lambda bill: (bill['bill_id'], bill['customer_name'], bill['bill_type'],
+                                                           bill['related_id'], f"{bill['due_amount']:.2f}",
+                                                           bill['due_date'], bill['status']),
+                                   key=lambda bill: bill['bill_id'],
+                                   count_label=self.count_label, estimate_total=BillingDAO.estimate_count)
         
         self.load_bills()
 
     def load_bills(self):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        bills = BillingDAO.get_all_with_details()
-        if bills:
-            for bill in bills:
-                self.tree.insert('', 'end', values=(
-                    bill['bill_id'], bill['customer_name'], bill['bill_type'],
-                    bill['related_id'], f"{bill['due_amount']:.2f}",
-                    bill['due_date'], bill['status']
-                ))
-        self.on_item_select(None) 
+        self.pager.reset()
+        self.on_item_select(None)
 
     def on_item_select(self, event):
-        selected_item = self.tree.focus()
-        if not selected_item:
-            self.mark_paid_btn.config(state='disabled')
-            self.generate_invoice_btn.config(state='disabled')
-            return
-        
-        self.generate_invoice_btn.config(state='normal')
-        
-        status = self.tree.item(selected_item)['values'][6]
-        if status == 'Unpaid':
+        selected_items = self.tree.selection()
+        self.generate_invoice_btn.config(state='normal' if len(selected_items) == 1 else 'disabled')
+        if self._unpaid_selection():
             self.mark_paid_btn.config(state='normal')
         else:
             self.mark_paid_btn.config(state='disabled')
 
+    def _unpaid_selection(self):
+        """Returns ``{bill_id: tree item}`` for the selected bills that are still unpaid."""
+        unpaid = {}
+        for item in self.tree.selection():
+            values = self.tree.item(item)['values']
+            if values[6] == 'Unpaid':
+                unpaid[values[0]] = item
+        return unpaid
+
     def mark_as_paid(self):
-        selected_item = self.tree.focus()
-        if not selected_item: return
-        
-        bill_id = self.tree.item(selected_item)['values'][0]
-        
-        if messagebox.askyesno("Confirm Payment", f"Mark Bill #{bill_id} as Paid?"):
-            BillingDAO.update_status(bill_id, 'Paid')
-            self.controller.show_status_message("Bill status updated.")
-            self.load_bills()
+        unpaid = self._unpaid_selection()
+        if not unpaid: return
+
+        prompt = f"Mark Bill #{next(iter(unpaid))} as Paid?" if len(unpaid) == 1 else f"Mark {len(unpaid)} bills as Paid?"
+        if messagebox.askyesno("Confirm Payment", prompt):
+            self.mark_paid_btn.config(state='disabled')
+            run_in_background(self, BillingDAO.update_statuses, list(unpaid), 'Paid',
+                              on_done=lambda changed: self._on_marked_paid(unpaid, changed))
+
+    def _on_marked_paid(self, unpaid, changed):
+        if changed is None:
+            messagebox.showerror("Error", "Could not update the selected bills.")
+            self.on_item_select(None)
+            return
+        # Patch the rows in place instead of reloading every page of bills.
+        for item in unpaid.values():
+            if self.tree.exists(item):
+                self.tree.set(item, "status", 'Paid')
+        for bill in self.pager.rows:
+            if bill['bill_id'] in unpaid:
+                bill['status'] = 'Paid'
+        self.on_item_select(None)
+        self.controller.show_status_message(f"{len(unpaid)} bill(s) marked as paid.")
 
     def generate_invoice(self):
-        selected_item = self.tree.focus()
-        if not selected_item:
+        selected_items = self.tree.selection()
+        if len(selected_items) != 1:
             return
+        selected_item = selected_items[0]
 
         item_data = self.tree.item(selected_item)['values']
         bill_id, _, bill_type, related_id, _, _, _ = item_data
         
-        invoice_text = ""
+        details = None
         if bill_type == 'Order':
             details = BillingDAO.get_order_invoice_details(related_id)
-            if details:
-                invoice_text = self._format_order_invoice_text(bill_id, related_id, details)
+            if details and not details['main_info']:
+                details = None
         elif bill_type == 'Advertisement':
             details = BillingDAO.get_ad_invoice_details(related_id)
-            if details:
-                invoice_text = self._format_ad_invoice_text(bill_id, related_id, details)
         
-        if not invoice_text:
+        if not details:
             messagebox.showerror("Error", "Could not retrieve invoice details.")
             return
             
-        self.save_invoice_file(bill_id, invoice_text)
+        self.save_invoice_file(bill_id, bill_type, related_id, details)
 
-    def _format_order_invoice_text(self, bill_id, order_id, details):
-        main_info = details['main_info']
-        items = details['items']
-        
-        status_stamp = f"*** {main_info['payment_status'].upper()} ***".center(70)
-                
-        text = f"""
-======================================================================
-                         Ekanayake Book City
-                            ORDER INVOICE
-======================================================================
-
-{status_stamp}
-
-Invoice #: {bill_id}
-Order ID:  {order_id}
-Date:      {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-
-Bill To:
-----------------------------------------------------------------------
-Name:    {main_info['name']}
-Address: {main_info['address']}
-Contact: {main_info['contact_no']}
-
-----------------------------------------------------------------------
-Order Details (Date: {main_info['order_date']})
-----------------------------------------------------------------------
-{'Item':<40} {'Qty':>5} {'Unit Price':>12} {'Subtotal':>12}
-----------------------------------------------------------------------
-"""
-        for item in items:
-            text += f"{item['title']:<40} {item['quantity']:>5} {item['price_per_unit']:>12.2f} {item['subtotal']:>12.2f}\n"
-        
-        text += f"""
-----------------------------------------------------------------------
-                                              TOTAL: {main_info['total_amount']:>12.2f}
-======================================================================
-                 Thank you for your business!
-======================================================================
-"""
-        return text
-
-    def _format_ad_invoice_text(self, bill_id, ad_id, details):
-        status_stamp = f"*** {details['payment_status'].upper()} ***".center(70)
-
-        text = f"""
-======================================================================
-                         Ekanayake Book City
-                        ADVERTISEMENT INVOICE
-======================================================================
-
-{status_stamp}
-
-Invoice #: {bill_id}
-Ad ID:     {ad_id}
-Date:      {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-
-Bill To:
-----------------------------------------------------------------------
-Name:    {details['name']}
-Address: {details['address']}
-Contact: {details['contact_no']}
-
-----------------------------------------------------------------------
-Advertisement Details
-----------------------------------------------------------------------
-Publication:      {details['publication_title']}
-Publication Date: {details['publication_date']}
-
-Content:
-"{details['content']}"
-
-----------------------------------------------------------------------
-                                                COST: {details['cost']:>12.2f}
-======================================================================
-                 Thank you for your business!
-======================================================================
-"""
-        return text
-
-    def save_invoice_file(self, bill_id, content):
+    def generate_batch_invoices(self):
+        start_date, end_date = self.batch_start_entry.get_date(), self.batch_end_entry.get_date()
+        if start_date > end_date:
+            messagebox.showerror("Error", "The start date must be on or before the end date.")
+            return
+        status = self.batch_status_combo.get()
+        status = None if status == "All" else status
+        spool_path = None
+        if self.batch_spool_var.get():
+            spool_path = os.path.join(self.invoices_dir, f"EBC-Invoices-{start_date}-to-{end_date}.txt")
+
+        self.batch_invoice_btn.config(state='disabled')
+        self.batch_indicator.show(f"Generating invoices due {start_date} to {end_date}...")
+        self.batch_task = run_in_background(self, generate_invoices, start_date, end_date, status, self.invoices_dir,
+                                            spool_path=spool_path, pass_cancel_event=True, cancel_with_widget=False,
+                                            on_done=self._on_batch_done, on_error=self._on_batch_error)
+
+    def cancel_batch_invoices(self):
+        if self.batch_task is not None:
+            # Cancelling sets the event the run checks between chunks; drop whatever it reports after.
+            self.batch_task.cancel()
+            self.batch_task = None
+        self.batch_indicator.hide()
+        self.batch_invoice_btn.config(state='normal')
+        self.controller.show_status_message("Batch invoicing cancelled.")
+
+    def _on_batch_error(self, error):
+        self.batch_task = None
+        self.batch_indicator.hide()
+        self.batch_invoice_btn.config(state='normal')
+        messagebox.showerror("Error", f"Batch invoicing failed: {error}")
+
+    def _on_batch_done(self, result):
+        self.batch_task = None
+        self.batch_indicator.hide()
+        self.batch_invoice_btn.config(state='normal')
+        if result is None:
+            messagebox.showerror("Error", "Could not read the bills to invoice.")
+            return
+        if not result.bills:
+            messagebox.showinfo("Batch Invoices", "No bills are due in that range.")
+            return
+
+        summary_message = "Batch Invoicing Complete.\n\n"
+        summary_message += f"Bills: {result.bills}\n"
+        summary_message += f"Invoices Written: {result.written}\n"
+        summary_message += f"Failed: {result.failed}\n"
+        summary_message += f"Fetch: {result.fetch_seconds:.2f} s, Render: {result.render_seconds:.2f} s "
+        summary_message += f"({result.per_second:.0f} invoices/s)\n"
+        summary_message += f"Saved To: {os.path.abspath(result.spool_path or self.invoices_dir)}"
+        for bill_id, reason in result.failures[:10]:
+            summary_message += f"\n  Bill {bill_id}: {reason}"
+        if result.failed > 10:
+            summary_message += f"\n  ...and {result.failed - 10} more"
+
+        messagebox.showinfo("Batch Invoices", summary_message)
+        self.controller.show_status_message(f"{result.written} invoices written to {self.invoices_dir}.")
+
+    def save_invoice_file(self, bill_id, bill_type, related_id, details):
         try:
             filepath = filedialog.asksaveasfilename(
                 defaultextension=".txt",
                 filetypes=[("Text Files", "*.txt"), ("All Files", "*.*")],
                 initialdir=self.invoices_dir, 
-                initialfile=f"EBC-Invoice-{bill_id}.txt"
+                initialfile=invoice_filename(bill_id)
             )
             if not filepath:
                 return 
 
             with open(filepath, "w", encoding="utf-8") as f:
-                f.write(content)
+                write_invoice(f, bill_type, bill_id, related_id, details)
             
             self.controller.show_status_message(f"Invoice saved to {filepath}")
         except Exception as e:
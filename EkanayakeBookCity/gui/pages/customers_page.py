@@ -1,6 +1,7 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from database.dao import CustomerDAO
+from gui.widgets.treeview_pager import TreeviewPager
 from PIL import Image, ImageTk 
 
 class CustomersPage(tk.Frame):
@@ -72,8 +73,16 @@ class CustomersPage(tk.Frame):
         self.tree.column("id", width=50, anchor='center')
         self.tree.column("name", width=200)
         self.tree.column("address", width=300)
+        scrollbar = ttk.Scrollbar(list_frame, orient='vertical')
+        scrollbar.pack(side='right', fill='y')
         self.tree.pack(fill="both", expand=True)
         self.tree.bind('<<TreeviewSelect>>', self.on_item_select)
+
+        self.pager = TreeviewPager(self.tree, scrollbar,
+                                   fetch_page=lambda after, limit: CustomerDAO.get_all(after, limit),
+                                   to_values=lambda cust: (cust['customer_id'], cust['name'], cust['address'],
+                                                           cust['contact_no'], cust['customer_type']),
+                                   key=lambda cust: cust['customer_id'])
         
         self.load_customers()
 
@@ -92,14 +101,7 @@ class CustomersPage(tk.Frame):
 
     # CRUD
     def load_customers(self):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        customers = CustomerDAO.get_all()
-        if customers:
-            for cust in customers:
-                self.tree.insert('', 'end', values=(
-                    cust['customer_id'], cust['name'], cust['address'], 
-                    cust['contact_no'], cust['customer_type']))
+        self.pager.reset()
 
     def add_customer(self):
         if not all([self.name_var.get(), self.contact_var.get(), self.type_var.get()]):
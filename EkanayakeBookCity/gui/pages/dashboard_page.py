@@ -1,6 +1,8 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from database.dao import PublicationDAO, CustomerDAO, OrderDAO, AdvertisementDAO, SubscriptionDAO
+from database.dao import DashboardDAO
+from database.order_generation import catch_up
+from gui.widgets.background_task import run_in_background, LoadingIndicator
 
 class DashboardPage(tk.Frame):
     def __init__(self, parent, controller):
@@ -27,63 +29,85 @@ class DashboardPage(tk.Frame):
         quick_actions_frame = ttk.LabelFrame(self, text="Quick Actions")
         quick_actions_frame.pack(fill='x', padx=10, pady=10)
 
-        generate_orders_btn = ttk.Button(quick_actions_frame, text="Generate Daily Subscription Orders",
-                                         command=self.generate_subscription_orders)
-        generate_orders_btn.pack(pady=10)
+        self.generate_orders_btn = ttk.Button(quick_actions_frame, text="Generate Daily Subscription Orders",
+                                              command=self.generate_subscription_orders)
+        self.generate_orders_btn.pack(pady=10)
+        self.generation_task = None
+        self.generation_indicator = LoadingIndicator(quick_actions_frame, on_cancel=self.cancel_generation, pady=(0, 10))
+
+        self.load_dashboard_data()
         
     def generate_subscription_orders(self):
         self.controller.show_status_message("Checking for due subscriptions...")
-        
-        due_subscriptions = SubscriptionDAO.get_due_subscriptions()
-        
-        if not due_subscriptions:
+        self.generate_orders_btn.config(state='disabled')
+        self.generation_indicator.show("Generating subscription orders...")
+        self.generation_task = run_in_background(self, self._generate_orders_job, pass_cancel_event=True, cancel_with_widget=False,
+                                                 on_done=self._on_generation_done, on_error=self._on_generation_error)
+
+    def cancel_generation(self):
+        if self.generation_task is not None:
+            self.generation_task.cancel()
+            self.generation_task = None
+        self.generation_indicator.hide()
+        self.generate_orders_btn.config(state='normal')
+        self.controller.show_status_message("Subscription order generation cancelled.")
+
+    def _on_generation_error(self, error):
+        self.generation_task = None
+        self.generation_indicator.hide()
+        self.generate_orders_btn.config(state='normal')
+        messagebox.showerror("Error", f"Subscription order generation failed: {error}")
+
+    def _on_generation_done(self, result):
+        self.generation_task = None
+        self.generation_indicator.hide()
+        self.generate_orders_btn.config(state='normal')
+        if result is None:
             messagebox.showinfo("Subscriptions", "No subscription orders are due to be generated today.")
             self.controller.clear_status_message()
             return
 
-        generated_count = 0
-        failed_count = 0
-
-        for sub in due_subscriptions:
-            items_to_order = SubscriptionDAO.get_subscription_items(sub['subscription_id'])
-            
-            if not items_to_order:
-                failed_count += 1
-                continue
-            order_items_list = [{'pub_id': item['publication_id'], 'quantity': item['quantity'], 'price': item['price']}
-                                for item in items_to_order]
-            
-            # Create the order
-            order_id = OrderDAO.create_order_from_subscription(sub['customer_id'], order_items_list)
-            
-            if order_id:
-                SubscriptionDAO.update_last_generated_date(sub['subscription_id'])
-                generated_count += 1
-            else:
-                failed_count += 1
-        
         summary_message = f"Subscription Order Generation Complete.\n\n"
-        summary_message += f"Successfully Generated: {generated_count}\n"
-        summary_message += f"Failed: {failed_count}"
+        summary_message += f"Successfully Generated: {result.generated}\n"
+        summary_message += f"Failed: {result.failed}"
+        summary_message += f"\nThroughput: {result.per_second:.1f} subscriptions/s"
+        if result.skipped:
+            summary_message += f"\nAlready generated elsewhere: {result.skipped}"
+        if result.empty:
+            summary_message += f"\nSkipped (no items): {result.empty}"
+        for subscription_id, reason in result.failures[:10]:
+            summary_message += f"\n  Subscription {subscription_id}: {reason}"
+        if result.failed > 10:
+            summary_message += f"\n  ...and {result.failed - 10} more"
         
         messagebox.showinfo("Generation Complete", summary_message)
         self.controller.show_status_message("Generation complete. See message box for summary.")
+        self.load_dashboard_data()
+
+    @staticmethod
+    def _generate_orders_job(cancel_event):
+        """Runs on a DAO worker thread; returns a ``GenerationResult`` or ``None`` if nothing was due."""
+        result = catch_up(cancel_event=cancel_event)
+        if result is None:
+            raise RuntimeError("Could not read the due subscriptions.")
+        return result if result.due else None
 
     def create_summary_cards(self, parent_frame):
         card_data = [
-            ("Total Publications", PublicationDAO.get_count(), "#8e44ad"),
-            ("Active Customers", CustomerDAO.get_count(), "#2980b9"),
-            ("Pending Orders", OrderDAO.get_pending_count(), "#c0392b"),
-            ("Today's Advertisements", AdvertisementDAO.get_todays_count(), "#27ae60")
+            ("Total Publications", "#8e44ad"),
+            ("Active Customers", "#2980b9"),
+            ("Pending Orders", "#c0392b"),
+            ("Today's Advertisements", "#27ae60")
         ]
 
-        for i, (title, value_func, color) in enumerate(card_data):
+        self.card_value_labels = []
+        for i, (title, color) in enumerate(card_data):
             card = tk.Frame(parent_frame, bg=color, relief='raised', borderwidth=2)
             card.grid(row=0, column=i, sticky='ew', padx=10, pady=5)
             
-            value = value_func if callable(value_func) else value_func
-            value_label = tk.Label(card, text=str(value), bg=color, fg='white', font=("Arial", 30, "bold"))
+            value_label = tk.Label(card, text="...", bg=color, fg='white', font=("Arial", 30, "bold"))
             value_label.pack(pady=(20, 0))
+            self.card_value_labels.append(value_label)
 
             title_label = tk.Label(card, text=title, bg=color, fg='white', font=("Arial", 12))
             title_label.pack(pady=(0, 20))
@@ -102,7 +126,23 @@ class DashboardPage(tk.Frame):
         tree.column("amount", width=100, anchor='e')
         tree.column("status", width=100, anchor='center')
 
-        recent_orders = OrderDAO.get_recent_orders(limit=15)
+        tree.pack(fill='both', expand=True, padx=5, pady=5)
+        self.recent_orders_tree = tree
+
+    def load_dashboard_data(self):
+        run_in_background(self, DashboardDAO.get_metrics, on_done=self._show_card_values)
+        run_in_background(self, DashboardDAO.get_recent_orders, limit=15, on_done=self._show_recent_orders)
+
+    def _show_card_values(self, metrics):
+        if not metrics:
+            return
+        values = [metrics['publications'], metrics['customers'], metrics['pending_orders'], metrics['todays_ads']]
+        for label, value in zip(self.card_value_labels, values):
+            label.config(text=str(value))
+
+    def _show_recent_orders(self, recent_orders):
+        tree = self.recent_orders_tree
+        tree.delete(*tree.get_children())
         if recent_orders:
             for order in recent_orders:
                 tree.insert('', 'end', values=(
@@ -112,6 +152,4 @@ class DashboardPage(tk.Frame):
                     f"{order['total_amount']:.2f}",
                     order['delivery_status']
                 ))
-        
-        tree.pack(fill='both', expand=True, padx=5, pady=5)
 
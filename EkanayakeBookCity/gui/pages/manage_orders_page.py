@@ -1,6 +1,8 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from database.dao import OrderDAO
+from gui.widgets.treeview_pager import TreeviewPager
+from gui.widgets.background_task import run_in_background
 
 class ManageOrdersPage(tk.Frame):
     def __init__(self, parent, controller):
@@ -22,28 +24,36 @@ class ManageOrdersPage(tk.Frame):
                                              command=self.mark_as_delivered, state='disabled')
         self.mark_delivered_btn.pack(side='right')
 
+        self.count_label = ttk.Label(controls_frame, text="")
+        self.count_label.pack(side='left')
+
         # Treeview for all orders
         order_cols = ("id", "customer", "date", "amount", "delivery_status", "payment_status")
         self.order_tree = ttk.Treeview(top_frame, columns=order_cols, show='headings')
         for col in order_cols: self.order_tree.heading(col, text=col.replace('_', ' ').title())
+        order_scrollbar = ttk.Scrollbar(top_frame, orient='vertical')
+        order_scrollbar.pack(side='right', fill='y', pady=5)
         self.order_tree.pack(fill='both', expand=True, padx=5, pady=5)
         self.order_tree.bind('<<TreeviewSelect>>', self.on_order_select)
 
+        self.pager = TreeviewPager(self.order_tree, order_scrollbar,
+                                   fetch_page=lambda after, limit: OrderDAO.get_all_with_details(after, limit),
+                                   to_values=lambda order: list(order.values()),
+                                   key=lambda order: order['order_id'],
+                                   count_label=self.count_label, estimate_total=OrderDAO.estimate_count)
+
         # Bottom Frame
         item_cols = ("title", "quantity", "unit_price", "subtotal")
         self.item_tree = ttk.Treeview(bottom_frame, columns=item_cols, show='headings')
         for col in item_cols: self.item_tree.heading(col, text=col.replace('_', ' ').title())
         self.item_tree.pack(fill='both', expand=True, padx=5, pady=5)
 
+        self.items_task = None
         self.load_orders()
 
     def load_orders(self):
-        for item in self.order_tree.get_children(): self.order_tree.delete(item)
-        orders = OrderDAO.get_all_with_details()
-        if orders:
-            for order in orders:
-                self.order_tree.insert('', 'end', values=list(order.values()))
-        self.on_order_select(None) 
+        self.pager.reset()
+        self.on_order_select(None)
 
     def on_order_select(self, event):
         for item in self.item_tree.get_children(): self.item_tree.delete(item)
@@ -59,7 +69,12 @@ class ManageOrdersPage(tk.Frame):
 
         self.mark_delivered_btn.config(state='normal' if delivery_status == 'Pending' else 'disabled')
 
-        order_items = OrderDAO.get_order_items(order_id)
+        if self.items_task is not None:
+            self.items_task.cancel()
+        self.items_task = run_in_background(self, OrderDAO.get_order_items, order_id, on_done=self._show_order_items)
+
+    def _show_order_items(self, order_items):
+        self.items_task = None
         if order_items:
             for item in order_items:
                 self.item_tree.insert('', 'end', values=list(item.values()))
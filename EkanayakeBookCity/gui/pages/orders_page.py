@@ -1,6 +1,8 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from database.dao import CustomerDAO, PublicationDAO, OrderDAO, StockDAO
+from gui.widgets.background_task import run_in_background, load_choices
+from config import SEARCH_DEBOUNCE_MS
 from datetime import date
 from PIL import Image, ImageTk
 
@@ -39,12 +41,10 @@ class OrdersPage(tk.Frame):
         bottom_frame.pack(fill='both', expand=True, padx=10, pady=10)
 
         # Widgets
-        customers = CustomerDAO.get_all()
-        customer_choices = [f"{c['customer_id']} - {c['name']}" for c in customers] if customers else []
-        
         ttk.Label(top_frame, text="Customer:").grid(row=0, column=0, padx=5, pady=5, sticky='w')
-        self.customer_combo = ttk.Combobox(top_frame, textvariable=self.customer_id_var, values=customer_choices, width=40, state='readonly')
+        self.customer_combo = ttk.Combobox(top_frame, textvariable=self.customer_id_var, values=[], width=40, state='readonly')
         self.customer_combo.grid(row=0, column=1, padx=5, pady=5)
+        load_choices(self.customer_combo, CustomerDAO.get_all, 'customer_id', 'name')
         
         ttk.Label(top_frame, text="Order Date:").grid(row=0, column=2, padx=5, pady=5, sticky='w')
         ttk.Entry(top_frame, textvariable=self.order_date_var).grid(row=0, column=3, padx=5, pady=5)
@@ -58,7 +58,11 @@ class OrdersPage(tk.Frame):
         search_frame = ttk.Frame(middle_frame)
         search_frame.pack(fill='x', padx=5, pady=5)
         ttk.Label(search_frame, text="Search Publication Name:").pack(side='left')
-        ttk.Entry(search_frame, textvariable=self.search_pub_var, width=50).pack(side='left', padx=5)
+        search_entry = ttk.Entry(search_frame, textvariable=self.search_pub_var, width=50)
+        search_entry.pack(side='left', padx=5)
+        search_entry.bind('<KeyRelease>', self.schedule_search)
+        self._search_job = None
+        self._search_task = None
         ttk.Button(search_frame, text="Search", image=self.search_icon, compound='left', command=self.search_publications).pack(side='left')
         
         self.search_tree = self.create_treeview(middle_frame, ("id", "title", "publisher", "price"))
@@ -82,7 +86,8 @@ class OrdersPage(tk.Frame):
         self.total_label.grid(row=0, column=0, sticky='e', padx=10)
         
         ttk.Button(action_bar_frame, text="Clear Order", command=self.clear_order).grid(row=0, column=1, padx=5)
-        ttk.Button(action_bar_frame, text="Create Order", command=self.create_order).grid(row=0, column=2, padx=10)
+        self.create_order_btn = ttk.Button(action_bar_frame, text="Create Order", command=self.create_order)
+        self.create_order_btn.grid(row=0, column=2, padx=10)
         
     def create_treeview(self, parent, columns):
         tree = ttk.Treeview(parent, columns=columns, show='headings')
@@ -92,10 +97,23 @@ class OrdersPage(tk.Frame):
             tree.column(col, width=100 if col not in ['title', 'publisher'] else 250)
         return tree
 
+    def schedule_search(self, event=None):
+        """Runs the search once typing pauses for ``SEARCH_DEBOUNCE_MS``."""
+        if self._search_job is not None:
+            self.after_cancel(self._search_job)
+        self._search_job = self.after(SEARCH_DEBOUNCE_MS, self.search_publications)
+
     def search_publications(self):
+        self._search_job = None
+        if self._search_task is not None:
+            self._search_task.cancel()
+        self._search_task = run_in_background(self, PublicationDAO.search_by_name, self.search_pub_var.get(),
+                                              on_done=self._show_search_results)
+
+    def _show_search_results(self, results):
+        self._search_task = None
         for item in self.search_tree.get_children():
             self.search_tree.delete(item)
-        results = PublicationDAO.search_by_name(self.search_pub_var.get())
         if results:
             for pub in results:
                 self.search_tree.insert('', 'end', values=(
@@ -147,26 +165,44 @@ class OrdersPage(tk.Frame):
             messagebox.showerror("Error", "Order must contain at least one publication.")
             return
         
-        for item in self.current_order_items:
-            available_stock = StockDAO.get_stock_quantity(item['pub_id'])
-            if item['quantity'] > available_stock:
-                messagebox.showerror("Insufficient Stock", 
-                                     f"Cannot create order.\n\n"
-                                     f"Item: {item['title']}\n"
-                                     f"Requested: {item['quantity']}\n"
-                                     f"Available: {available_stock}")
-                return
-        
         cust_id = int(cust_selection.split(' - ')[0])
         
-        order_id = OrderDAO.create_order(
+        order = dict(
             customer_id=cust_id,
             order_date=self.order_date_var.get(),
             total_amount=self.total_amount,
-            items=self.current_order_items,
+            items=list(self.current_order_items),
             delivery_status=self.delivery_status_var.get(),
             payment_status=self.payment_status_var.get()
         )
+        self.create_order_btn.config(state='disabled')
+        run_in_background(self, self._create_order_job, order, on_done=self._on_order_created,
+                          on_error=self._on_order_failed)
+
+    @staticmethod
+    def _create_order_job(order):
+        """Runs on a DAO worker thread; returns ``(order_id, None)`` or ``(None, (item, available))`` if stock is short."""
+        for item in order['items']:
+            available_stock = StockDAO.get_stock_quantity(item['pub_id'])
+            if item['quantity'] > available_stock:
+                return None, (item, available_stock)
+        return OrderDAO.create_order(**order), None
+
+    def _on_order_failed(self, error):
+        self.create_order_btn.config(state='normal')
+        messagebox.showerror("Error", f"Failed to create order: {error}")
+
+    def _on_order_created(self, outcome):
+        self.create_order_btn.config(state='normal')
+        order_id, shortage = outcome
+        if shortage is not None:
+            item, available_stock = shortage
+            messagebox.showerror("Insufficient Stock", 
+                                 f"Cannot create order.\n\n"
+                                 f"Item: {item['title']}\n"
+                                 f"Requested: {item['quantity']}\n"
+                                 f"Available: {available_stock}")
+            return
         
         if order_id:
             self.controller.show_status_message(f"Order #{order_id} created successfully.")
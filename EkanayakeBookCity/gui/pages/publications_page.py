@@ -1,6 +1,7 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from database.dao import PublicationDAO
+from gui.widgets.treeview_pager import TreeviewPager
 from PIL import Image, ImageTk
 
 class PublicationsPage(tk.Frame):
@@ -78,8 +79,16 @@ class PublicationsPage(tk.Frame):
         self.tree.column("id", width=50, anchor='center')
         self.tree.column("price", width=80, anchor='e') 
         
+        scrollbar = ttk.Scrollbar(list_frame, orient='vertical')
+        scrollbar.pack(side='right', fill='y')
         self.tree.pack(fill="both", expand=True)
         self.tree.bind('<<TreeviewSelect>>', self.on_item_select)
+
+        self.pager = TreeviewPager(self.tree, scrollbar,
+                                   fetch_page=lambda after, limit: PublicationDAO.get_all(after, limit),
+                                   to_values=lambda pub: (pub['publication_id'], pub['category'], pub['title'],
+                                                          pub['publisher'], pub['publish_type'], f"{pub['price']:.2f}"),
+                                   key=lambda pub: pub['publication_id'])
         
         self.load_publications()
 
@@ -110,15 +119,7 @@ class PublicationsPage(tk.Frame):
 
     # CRUD
     def load_publications(self):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        publications = PublicationDAO.get_all()
-        if publications:
-            for pub in publications:
-                self.tree.insert('', 'end', values=(
-                    pub['publication_id'], pub['category'], pub['title'], 
-                    pub['publisher'], pub['publish_type'], f"{pub['price']:.2f}"
-                ))
+        self.pager.reset()
 
     def add_publication(self):
         if not all([self.category_var.get(), self.title_var.get(), self.type_var.get(), self.price_var.get()]):
@@ -2,8 +2,18 @@ import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 from tkcalendar import DateEntry 
 from database.dao import ReportDAO, CustomerDAO
+from gui.widgets.background_task import run_in_background, load_choices, StreamTask, LoadingIndicator
+from database.export import export_rows, format_for, FORMATS
+from database.statements import generate_statements
+try:
+    from database import analytics
+    ANALYTICS_REPORTS = list(analytics.REPORTS)
+except ImportError:
+    print("Warning: NumPy is not installed; analytics reports are unavailable.")
+    analytics = None
+    ANALYTICS_REPORTS = []
+from config import REPORT_DISPLAY_LIMIT, STATEMENTS_DIR
 from datetime import datetime, date
-import csv
 import os
 
 class ReportsPage(tk.Frame):
@@ -26,7 +36,7 @@ class ReportsPage(tk.Frame):
         ttk.Label(filter_frame, text="Report Type:").grid(row=0, column=0, padx=5, pady=5, sticky='w')
         self.report_type_var = tk.StringVar()
         self.report_combo = ttk.Combobox(filter_frame, textvariable=self.report_type_var,
-                                         values=["Sales Report", "Stock Level Report", "Customer Statement"],
+                                         values=["Sales Report", "Stock Level Report", "Customer Statement"] + ANALYTICS_REPORTS,
                                          state='readonly', width=30)
         self.report_combo.grid(row=0, column=1, padx=5, pady=5)
         self.report_combo.bind("<<ComboboxSelected>>", self.on_report_type_change)
@@ -37,14 +47,25 @@ class ReportsPage(tk.Frame):
         self.end_date_label = ttk.Label(filter_frame, text="End Date:")
         self.end_date_entry = DateEntry(filter_frame, date_pattern='y-mm-dd')
         
-        customers = CustomerDAO.get_all()
-        customer_choices = [f"{c['customer_id']} - {c['name']}" for c in customers] if customers else []
         self.customer_label = ttk.Label(filter_frame, text="Customer:")
         self.customer_var = tk.StringVar()
-        self.customer_combo = ttk.Combobox(filter_frame, textvariable=self.customer_var, values=customer_choices, state='readonly', width=30)
+        self.customer_combo = ttk.Combobox(filter_frame, textvariable=self.customer_var, values=[], state='readonly', width=30)
+        load_choices(self.customer_combo, CustomerDAO.get_all, 'customer_id', 'name')
         
         self.generate_btn = ttk.Button(filter_frame, text="Generate Report", command=self.generate_report)
-        self.export_btn = ttk.Button(filter_frame, text="Export to CSV", command=self.export_to_csv, state='disabled')
+        self.export_btn = ttk.Button(filter_frame, text="Export...", command=self.export_report, state='disabled')
+        self.statements_btn = ttk.Button(filter_frame, text="All Postpaid Statements", command=self.generate_all_statements)
+
+        self.report_task = None
+        self.current_report = None
+        self.rows_loaded = 0
+        self.loading_indicator = LoadingIndicator(self, on_cancel=self.cancel_report, before=self.results_frame, fill='x', padx=10)
+        self.export_task = None
+        self.export_rows = 0
+        self.export_indicator = LoadingIndicator(self, on_cancel=self.cancel_export, before=self.results_frame, fill='x', padx=10)
+        self.statements_task = None
+        self.statements_written = 0
+        self.statements_indicator = LoadingIndicator(self, on_cancel=self.cancel_statements, before=self.results_frame, fill='x', padx=10)
 
         # Treeview for results
         self.tree = ttk.Treeview(self.results_frame, show='headings')
@@ -66,10 +87,11 @@ class ReportsPage(tk.Frame):
         self.customer_combo.grid_forget()
         self.generate_btn.grid_forget()
         self.export_btn.grid_forget()
+        self.statements_btn.grid_forget()
 
         report_type = self.report_type_var.get()
         
-        if report_type in ["Sales Report", "Customer Statement"]:
+        if report_type in ["Sales Report", "Customer Statement"] + ANALYTICS_REPORTS:
             self.start_date_label.grid(row=1, column=0, padx=5, pady=5, sticky='w')
             self.start_date_entry.grid(row=1, column=1, padx=5, pady=5)
             self.end_date_label.grid(row=1, column=2, padx=5, pady=5, sticky='w')
@@ -80,7 +102,8 @@ class ReportsPage(tk.Frame):
             self.customer_combo.grid(row=2, column=1, padx=5, pady=5)
             self.generate_btn.grid(row=2, column=2, padx=10, pady=5)
             self.export_btn.grid(row=2, column=3, padx=5, pady=5)
-        elif report_type == "Sales Report":
+            self.statements_btn.grid(row=2, column=4, padx=5, pady=5)
+        elif report_type == "Sales Report" or report_type in ANALYTICS_REPORTS:
             self.generate_btn.grid(row=1, column=4, padx=10, pady=5)
             self.export_btn.grid(row=1, column=5, padx=5, pady=5)
         elif report_type == "Stock Level Report":
@@ -90,38 +113,72 @@ class ReportsPage(tk.Frame):
     def generate_report(self):
         report_type = self.report_type_var.get()
         self.clear_treeview()
-        data = []
         columns = []
 
-        try:
-            if report_type == "Sales Report":
-                columns = ("order_id", "order_date", "customer_name", "publication_title", "quantity", "price_per_unit", "subtotal")
-                start_date = self.start_date_entry.get_date()
-                end_date = self.end_date_entry.get_date()
-                data = ReportDAO.get_sales_report(start_date, end_date)
-            
-            elif report_type == "Stock Level Report":
-                columns = ("publication_id", "title", "category", "quantity")
-                data = ReportDAO.get_stock_level_report()
-
-            elif report_type == "Customer Statement":
-                columns = ("bill_id", "bill_type", "transaction_id", "due_date", "due_amount", "status")
-                cust_selection = self.customer_var.get()
-                if not cust_selection:
-                    messagebox.showerror("Error", "Please select a customer.")
-                    return
-                customer_id = int(cust_selection.split(' - ')[0])
-                start_date = self.start_date_entry.get_date()
-                end_date = self.end_date_entry.get_date()
-                data = ReportDAO.get_customer_statement(customer_id, start_date, end_date)
-
-            self.setup_treeview_columns(columns)
-            self.populate_treeview(data, columns)
-            self.export_btn.config(state='normal' if data else 'disabled')
-
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to generate report: {e}")
-            self.export_btn.config(state='disabled')
+        if report_type == "Sales Report":
+            columns = ("order_id", "order_date", "customer_name", "publication_title", "quantity", "price_per_unit", "subtotal")
+            query, args = ReportDAO.stream_sales_report, (self.start_date_entry.get_date(), self.end_date_entry.get_date())
+        
+        elif report_type == "Stock Level Report":
+            columns = ("publication_id", "title", "category", "quantity")
+            query, args = ReportDAO.stream_stock_level_report, ()
+
+        elif report_type == "Customer Statement":
+            columns = ("bill_id", "bill_type", "transaction_id", "due_date", "due_amount", "status")
+            cust_selection = self.customer_var.get()
+            if not cust_selection:
+                messagebox.showerror("Error", "Please select a customer.")
+                return
+            customer_id = int(cust_selection.split(' - ')[0])
+            query, args = ReportDAO.stream_customer_statement, (customer_id, self.start_date_entry.get_date(), self.end_date_entry.get_date())
+
+        elif report_type in ANALYTICS_REPORTS:
+            columns = analytics.REPORTS[report_type][0]
+            query, args = analytics.stream_report, (report_type, self.start_date_entry.get_date(), self.end_date_entry.get_date())
+        else:
+            return
+
+        if report_type != "Stock Level Report" and self.start_date_entry.get_date() > self.end_date_entry.get_date():
+            messagebox.showerror("Error", "The start date must be on or before the end date.")
+            return
+
+        self.cancel_report()
+        self.current_report = (query, args, columns)
+        self.rows_loaded = 0
+        self.setup_treeview_columns(columns)
+        self.generate_btn.config(state='disabled')
+        self.export_btn.config(state='disabled')
+        self.loading_indicator.show(f"Running {report_type}...")
+        self.report_task = StreamTask(self, query, *args,
+                                      on_chunk=lambda chunk: self.populate_treeview(chunk, columns),
+                                      on_done=self._show_report, on_error=self._on_report_error)
+
+    def cancel_report(self):
+        if self.report_task is not None:
+            self.report_task.cancel()
+            self.report_task = None
+        self.loading_indicator.hide()
+        self.generate_btn.config(state='normal')
+
+    def _show_report(self, total_rows):
+        self.report_task = None
+        self.loading_indicator.hide()
+        self.generate_btn.config(state='normal')
+        if not total_rows:
+            self.controller.show_status_message("No data found for the selected criteria.")
+        elif total_rows > REPORT_DISPLAY_LIMIT:
+            self.controller.show_status_message(
+                f"Showing the first {REPORT_DISPLAY_LIMIT:,} of {total_rows:,} rows. Export the report for every row.")
+        else:
+            self.controller.show_status_message(f"{total_rows:,} rows.")
+        self.export_btn.config(state='normal' if total_rows else 'disabled')
+
+    def _on_report_error(self, error):
+        self.report_task = None
+        self.loading_indicator.hide()
+        self.generate_btn.config(state='normal')
+        messagebox.showerror("Error", f"Failed to generate report: {error}")
+        self.export_btn.config(state='disabled')
 
     def setup_treeview_columns(self, columns):
         self.tree["columns"] = columns
@@ -129,20 +186,20 @@ class ReportsPage(tk.Frame):
             self.tree.heading(col, text=col.replace('_', ' ').title())
             self.tree.column(col, width=120, anchor='w')
 
-    def populate_treeview(self, data, columns):
-        if not data:
-            self.controller.show_status_message("No data found for the selected criteria.")
-            return
-
-        for row in data:
+    def populate_treeview(self, chunk, columns):
+        """Shows one streamed chunk, up to ``REPORT_DISPLAY_LIMIT`` rows in total; the chunk is then dropped."""
+        room = REPORT_DISPLAY_LIMIT - self.rows_loaded
+        for row in chunk[:max(room, 0)]:
             values = [row.get(col, '') for col in columns]
             self.tree.insert('', 'end', values=values)
+        self.rows_loaded += len(chunk)
+        self.loading_indicator.set_message(f"Loaded {self.rows_loaded:,} rows...")
 
     def clear_treeview(self):
         self.tree.delete(*self.tree.get_children())
 
-    def export_to_csv(self):
-        if not self.tree.get_children():
+    def export_report(self):
+        if not self.tree.get_children() or self.current_report is None:
             messagebox.showerror("Error", "No data to export.")
             return
         
@@ -155,21 +212,112 @@ class ReportsPage(tk.Frame):
             initialfile=suggested_filename, 
             title="Save Report As",
             defaultextension=".csv",
-            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")]
+            filetypes=[("CSV files", "*.csv"), ("Compressed CSV files", "*.csv.gz"),
+                       ("JSON Lines files", "*.jsonl"), ("All files", "*.*")]
         )
 
         if not filename:
             return
 
-        try:
-            with open(filename, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                columns = self.tree["columns"]
-                writer.writerow(columns)
-                
-                for child in self.tree.get_children():
-                    row = self.tree.item(child)['values']
-                    writer.writerow(row)
-            self.controller.show_status_message(f"Report exported successfully to {filename}")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to export file: {e}")
+        query, args, columns = self.current_report
+        self.export_rows = 0
+        self.export_btn.config(state='disabled')
+        self.export_indicator.show(f"Exporting {FORMATS[format_for(filename)]}...")
+        self.export_task = run_in_background(self, self._export_job, filename, query, args, columns,
+                                             pass_cancel_event=True, cancel_with_widget=False,
+                                             on_done=self._on_export_done, on_error=self._on_export_error)
+        self.after(200, self._show_export_progress)
+
+    def _export_job(self, filename, query, args, columns, cancel_event):
+        """Runs on a DAO worker thread: re-runs the report as a stream straight into ``filename``."""
+        rows = export_rows(query(*args), columns, filename, progress=self._set_export_rows, cancel_event=cancel_event)
+        return filename, rows
+
+    def _set_export_rows(self, rows):
+        # Called from the worker thread; the Tk side picks the figure up in _show_export_progress.
+        self.export_rows = rows
+
+    def _show_export_progress(self):
+        if self.export_task is None:
+            return
+        self.export_indicator.set_message(f"Exported {self.export_rows:,} rows...")
+        self.after(200, self._show_export_progress)
+
+    def cancel_export(self):
+        if self.export_task is not None:
+            self.export_task.cancel()
+            self.export_task = None
+        self.export_indicator.hide()
+        self.export_btn.config(state='normal')
+        self.controller.show_status_message("Export cancelled.")
+
+    def _on_export_done(self, result):
+        self.export_task = None
+        self.export_indicator.hide()
+        self.export_btn.config(state='normal')
+        filename, rows = result
+        self.controller.show_status_message(f"Exported {rows:,} rows to {filename}")
+
+    def _on_export_error(self, error):
+        self.export_task = None
+        self.export_indicator.hide()
+        self.export_btn.config(state='normal')
+        messagebox.showerror("Error", f"Failed to export file: {error}")
+
+    def generate_all_statements(self):
+        start_date, end_date = self.start_date_entry.get_date(), self.end_date_entry.get_date()
+        if start_date > end_date:
+            messagebox.showerror("Error", "The start date must be on or before the end date.")
+            return
+        self.statements_written = 0
+        self.statements_btn.config(state='disabled')
+        self.statements_indicator.show(f"Writing statements for {start_date} to {end_date}...")
+        self.statements_task = run_in_background(self, generate_statements, start_date, end_date,
+                                                 progress=self._set_statements_written,
+                                                 pass_cancel_event=True, cancel_with_widget=False,
+                                                 on_done=self._on_statements_done, on_error=self._on_statements_error)
+        self.after(200, self._show_statements_progress)
+
+    def _set_statements_written(self, written):
+        # Called from the worker thread; the Tk side picks the figure up in _show_statements_progress.
+        self.statements_written = written
+
+    def _show_statements_progress(self):
+        if self.statements_task is None:
+            return
+        self.statements_indicator.set_message(f"Written {self.statements_written:,} statements...")
+        self.after(200, self._show_statements_progress)
+
+    def cancel_statements(self):
+        if self.statements_task is not None:
+            self.statements_task.cancel()
+            self.statements_task = None
+        self.statements_indicator.hide()
+        self.statements_btn.config(state='normal')
+        self.controller.show_status_message("Statement run cancelled.")
+
+    def _on_statements_done(self, result):
+        self.statements_task = None
+        self.statements_indicator.hide()
+        self.statements_btn.config(state='normal')
+
+        summary_message = "Statement Run Complete.\n\n"
+        summary_message += f"Customers: {result.customers} ({result.skipped} with nothing to state)\n"
+        summary_message += f"Statements Written: {result.written}\n"
+        summary_message += f"Bills: {result.bills}\n"
+        summary_message += f"Failed: {result.failed}\n"
+        summary_message += f"Time: {result.elapsed:.2f} s ({result.per_second:.0f} statements/s)\n"
+        summary_message += f"Saved To: {os.path.abspath(STATEMENTS_DIR)}"
+        for customer_id, reason in result.failures[:10]:
+            summary_message += f"\n  Customer {customer_id}: {reason}"
+        if result.failed > 10:
+            summary_message += f"\n  ...and {result.failed - 10} more"
+
+        messagebox.showinfo("Statements", summary_message)
+        self.controller.show_status_message(f"{result.written} statements written to {STATEMENTS_DIR}.")
+
+    def _on_statements_error(self, error):
+        self.statements_task = None
+        self.statements_indicator.hide()
+        self.statements_btn.config(state='normal')
+        messagebox.showerror("Error", f"Statement run failed: {error}")
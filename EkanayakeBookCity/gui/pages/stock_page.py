@@ -1,6 +1,7 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from database.dao import StockDAO, PublicationDAO
+from gui.widgets.background_task import run_in_background, load_choices
 
 class StockPage(tk.Frame):
     def __init__(self, parent, controller):
@@ -15,12 +16,10 @@ class StockPage(tk.Frame):
         entry_frame = ttk.LabelFrame(self, text="Manage Stock")
         entry_frame.pack(fill="x", padx=10, pady=10)
 
-        publications = PublicationDAO.get_all()
-        pub_choices = [f"{p['publication_id']} - {p['title']}" for p in publications] if publications else []
-
         ttk.Label(entry_frame, text="Publication:").grid(row=0, column=0, padx=5, pady=5, sticky='w')
-        self.pub_combo = ttk.Combobox(entry_frame, textvariable=self.publication_id_var, values=pub_choices, width=40, state='readonly')
+        self.pub_combo = ttk.Combobox(entry_frame, textvariable=self.publication_id_var, values=[], width=40, state='readonly')
         self.pub_combo.grid(row=0, column=1, padx=5, pady=5, columnspan=2)
+        load_choices(self.pub_combo, PublicationDAO.get_all, 'publication_id', 'title')
         
         ttk.Label(entry_frame, text="Quantity to Add / Set:").grid(row=1, column=0, padx=5, pady=5, sticky='w')
         ttk.Entry(entry_frame, textvariable=self.quantity_var).grid(row=1, column=1, padx=5, pady=5, columnspan=2)
@@ -49,12 +48,18 @@ class StockPage(tk.Frame):
         self.tree.pack(fill="both", expand=True)
         self.tree.bind('<<TreeviewSelect>>', self.on_item_select)
         
+        self.load_task = None
         self.load_stock()
 
     def load_stock(self):
+        if self.load_task is not None:
+            self.load_task.cancel()
+        self.load_task = run_in_background(self, StockDAO.get_all_with_details, on_done=self._show_stock)
+
+    def _show_stock(self, stock_list):
+        self.load_task = None
         for item in self.tree.get_children():
             self.tree.delete(item)
-        stock_list = StockDAO.get_all_with_details()
         if stock_list:
             for item in stock_list:
                 self.tree.insert('', 'end', values=(
@@ -2,6 +2,9 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from tkcalendar import DateEntry
 from database.dao import CustomerDAO, PublicationDAO, SubscriptionDAO
+from gui.widgets.treeview_pager import TreeviewPager
+from gui.widgets.background_task import run_in_background, load_choices
+from config import SEARCH_DEBOUNCE_MS
 from datetime import date
 
 class SubscriptionsPage(tk.Frame):
@@ -33,11 +36,10 @@ class SubscriptionsPage(tk.Frame):
         bottom_frame.pack(fill='both', expand=True, padx=10, pady=10)
         
         # Widgets
-        customers = CustomerDAO.get_all()
-        customer_choices = [f"{c['customer_id']} - {c['name']}" for c in customers] if customers else []
-        
         ttk.Label(details_frame, text="Customer:").grid(row=0, column=0, padx=5, pady=5, sticky='w')
-        ttk.Combobox(details_frame, textvariable=self.customer_var, values=customer_choices, width=30, state='readonly').grid(row=0, column=1, padx=5, pady=5)
+        customer_combo = ttk.Combobox(details_frame, textvariable=self.customer_var, values=[], width=30, state='readonly')
+        customer_combo.grid(row=0, column=1, padx=5, pady=5)
+        load_choices(customer_combo, CustomerDAO.get_all, 'customer_id', 'name')
         
         ttk.Label(details_frame, text="Start Date:").grid(row=1, column=0, padx=5, pady=5, sticky='w')
         DateEntry(details_frame, textvariable=self.start_date_var, date_pattern='y-mm-dd').grid(row=1, column=1, padx=5, pady=5)
@@ -53,7 +55,11 @@ class SubscriptionsPage(tk.Frame):
 
         search_frame = ttk.Frame(add_item_frame)
         search_frame.pack(fill='x', pady=5)
-        ttk.Entry(search_frame, textvariable=self.search_pub_var, width=30).pack(side='left', padx=5)
+        search_entry = ttk.Entry(search_frame, textvariable=self.search_pub_var, width=30)
+        search_entry.pack(side='left', padx=5)
+        search_entry.bind('<KeyRelease>', self.schedule_search)
+        self._search_job = None
+        self._search_task = None
         ttk.Button(search_frame, text="Search", command=self.search_publications).pack(side='left')
 
         self.search_tree = ttk.Treeview(add_item_frame, columns=("id", "title"), show='headings', height=4)
@@ -76,18 +82,41 @@ class SubscriptionsPage(tk.Frame):
         list_controls = ttk.Frame(bottom_frame)
         list_controls.pack(fill='x', pady=5)
         ttk.Button(list_controls, text="Cancel Selected", command=self.cancel_subscription).pack(side='right')
+        self.count_label = ttk.Label(list_controls, text="")
+        self.count_label.pack(side='left')
 
         columns = ("id", "customer", "start_date", "end_date", "frequency", "status")
         self.sub_list_tree = ttk.Treeview(bottom_frame, columns=columns, show='headings')
         for col in columns: self.sub_list_tree.heading(col, text=col.replace('_', ' ').title())
+        sub_scrollbar = ttk.Scrollbar(bottom_frame, orient='vertical')
+        sub_scrollbar.pack(side='right', fill='y')
         self.sub_list_tree.pack(fill='both', expand=True)
+
+        self.pager = TreeviewPager(self.sub_list_tree, sub_scrollbar,
+                                   fetch_page=lambda after, limit: SubscriptionDAO.get_all_with_details(after, limit),
+                                   to_values=lambda sub: list(sub.values()),
+                                   key=lambda sub: (sub['start_date'], sub['subscription_id']),
+                                   count_label=self.count_label, estimate_total=SubscriptionDAO.estimate_count)
         
         self.load_subscriptions()
 
     # GUI
+    def schedule_search(self, event=None):
+        """Runs the search once typing pauses for ``SEARCH_DEBOUNCE_MS``."""
+        if self._search_job is not None:
+            self.after_cancel(self._search_job)
+        self._search_job = self.after(SEARCH_DEBOUNCE_MS, self.search_publications)
+
     def search_publications(self):
+        self._search_job = None
+        if self._search_task is not None:
+            self._search_task.cancel()
+        self._search_task = run_in_background(self, PublicationDAO.search_by_name, self.search_pub_var.get(),
+                                              on_done=self._show_search_results)
+
+    def _show_search_results(self, results):
+        self._search_task = None
         for item in self.search_tree.get_children(): self.search_tree.delete(item)
-        results = PublicationDAO.search_by_name(self.search_pub_var.get())
         if results:
             for pub in results: self.search_tree.insert('', 'end', values=(pub['publication_id'], pub['title']))
 
@@ -109,10 +138,7 @@ class SubscriptionsPage(tk.Frame):
             self.items_tree.insert('', 'end', values=(item['pub_id'], item['title'], item['quantity']))
             
     def load_subscriptions(self):
-        for item in self.sub_list_tree.get_children(): self.sub_list_tree.delete(item)
-        subscriptions = SubscriptionDAO.get_all_with_details()
-        if subscriptions:
-            for sub in subscriptions: self.sub_list_tree.insert('', 'end', values=list(sub.values()))
+        self.pager.reset()
 
     def clear_form(self):
         self.customer_var.set('')
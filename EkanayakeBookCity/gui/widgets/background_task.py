@@ -0,0 +1,152 @@
+import queue
+import threading
+import tkinter as tk
+from tkinter import ttk, messagebox
+from database import background
+
+
+class BackgroundTask:
+    """Runs a DAO call on the worker pool and hands the result back to Tk.
+
+    Tk widgets may only be touched from the main thread, so the future is
+    polled with ``after()`` and ``on_done``/``on_error`` run on the Tk thread.
+    Cancelling drops a call that hasn't started and discards the result of one
+    that has; long jobs that accept a ``cancel_event`` keyword can also stop early.
+    If the widget is destroyed first the task is cancelled too, unless
+    ``cancel_with_widget`` is False (batch jobs that should finish regardless).
+    """
+
+    def __init__(self, widget, fn, *args, on_done=None, on_error=None, pass_cancel_event=False,
+                 cancel_with_widget=True, poll_ms=50, **kwargs):
+        self.widget = widget
+        self.cancel_with_widget = cancel_with_widget
+        self.on_done = on_done
+        self.on_error = on_error
+        self.poll_ms = poll_ms
+        self.cancel_event = threading.Event()
+        if pass_cancel_event:
+            kwargs['cancel_event'] = self.cancel_event
+        self.future = background.submit(fn, *args, **kwargs)
+        self.widget.after(self.poll_ms, self._poll)
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def cancel(self):
+        self.cancel_event.set()
+        self.future.cancel()
+
+    def _poll(self):
+        if self.cancelled:
+            return
+        try:
+            alive = self.widget.winfo_exists()
+        except tk.TclError:
+            alive = False
+        if not alive:
+            if self.cancel_with_widget:
+                self.cancel()
+            return
+        if not self._ready():
+            self.widget.after(self.poll_ms, self._poll)
+            return
+
+        error = self.future.exception()
+        if error is not None:
+            if self.on_error:
+                self.on_error(error)
+            else:
+                print(f"Background task failed: {error}")
+                messagebox.showerror("Error", f"Operation failed: {error}")
+        elif self.on_done:
+            self.on_done(self.future.result())
+
+    def _ready(self):
+        return self.future.done()
+
+
+class StreamTask(BackgroundTask):
+    """Runs a generator of chunks on the worker pool and feeds each chunk to ``on_chunk`` on the Tk thread.
+
+    At most ``max_pending`` chunks wait between the threads; the worker blocks
+    once that many are queued, so memory stays bounded however much the
+    generator yields. ``on_done`` receives the total number of rows delivered.
+    Cancelling closes the generator, which releases whatever it holds.
+    """
+
+    def __init__(self, widget, fn, *args, on_chunk=None, max_pending=4, **kwargs):
+        self.on_chunk = on_chunk
+        self.chunks = queue.Queue(maxsize=max_pending)
+        super().__init__(widget, self._pump, fn, *args, **kwargs)
+
+    def _pump(self, fn, *args, **kwargs):
+        stream = fn(*args, **kwargs)
+        rows = 0
+        try:
+            for chunk in stream:
+                while not self.cancel_event.is_set():
+                    try:
+                        self.chunks.put(chunk, timeout=0.1)
+                        break
+                    except queue.Full:
+                        pass
+                if self.cancel_event.is_set():
+                    break
+                rows += len(chunk)
+        finally:
+            stream.close()
+        return rows
+
+    def _ready(self):
+        # Read "done" first: every chunk put before the worker finished is then drained below.
+        done = self.future.done()
+        while True:
+            try:
+                chunk = self.chunks.get_nowait()
+            except queue.Empty:
+                break
+            if self.on_chunk:
+                self.on_chunk(chunk)
+            if self.cancelled:
+                return False
+        return done
+
+
+def run_in_background(widget, fn, *args, on_done=None, on_error=None, **kwargs):
+    return BackgroundTask(widget, fn, *args, on_done=on_done, on_error=on_error, **kwargs)
+
+
+def load_choices(combo, fetch, id_key, label_key):
+    """Fills ``combo`` with ``"<id> - <label>"`` choices from ``fetch()``, run off the Tk thread."""
+    def fill(rows):
+        combo['values'] = [f"{row[id_key]} - {row[label_key]}" for row in rows] if rows else []
+    return run_in_background(combo, fetch, on_done=fill)
+
+
+class LoadingIndicator(ttk.Frame):
+    """Indeterminate progress bar with a message and an optional Cancel button."""
+
+    def __init__(self, parent, on_cancel=None, **pack_options):
+        super().__init__(parent)
+        self.pack_options = pack_options or {'fill': 'x', 'padx': 10, 'pady': 2}
+        self.label = ttk.Label(self, text="Loading...")
+        self.label.pack(side='left', padx=5)
+        self.progress = ttk.Progressbar(self, mode='indeterminate', length=160)
+        self.progress.pack(side='left', padx=5)
+        self.cancel_btn = None
+        if on_cancel:
+            self.cancel_btn = ttk.Button(self, text="Cancel", command=on_cancel)
+            self.cancel_btn.pack(side='left', padx=5)
+
+    def show(self, message="Loading..."):
+        self.label.config(text=message)
+        self.pack(**self.pack_options)
+        self.progress.start(15)
+
+    def set_message(self, message):
+        self.label.config(text=message)
+
+    def hide(self):
+        self.progress.stop()
+        self.pack_forget()
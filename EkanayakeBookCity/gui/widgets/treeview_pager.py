@@ -0,0 +1,100 @@
+from config import LIST_PAGE_SIZE
+from gui.widgets.background_task import BackgroundTask
+
+
+class TreeviewPager:
+    """Fills a Treeview one keyset page at a time as the user scrolls.
+
+    ``fetch_page(after, limit)`` returns the next rows after the key ``after``
+    (``None`` for the first page), ``to_values(row)`` turns a row into Treeview
+    values and ``key(row)`` gives the key to continue after. When the view is
+    scrolled close to the bottom the next page is requested. Pages are fetched
+    on the DAO worker pool so a slow query never blocks the window.
+    """
+
+    def __init__(self, tree, scrollbar, fetch_page, to_values, key, page_size=LIST_PAGE_SIZE,
+                 count_label=None, estimate_total=None):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.fetch_page = fetch_page
+        self.to_values = to_values
+        self.key = key
+        self.page_size = page_size
+        self.count_label = count_label
+        self.estimate_total = estimate_total
+        self.rows = []
+        self._after = None
+        self._exhausted = False
+        self._loading = False
+        self._scheduled = False
+        self._total = None
+        self._task = None
+
+        self.tree.config(yscrollcommand=self._on_scroll)
+        self.scrollbar.config(command=self.tree.yview)
+
+    def reset(self):
+        """Clears the view and loads the first page again."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self.tree.delete(*self.tree.get_children())
+        self.rows = []
+        self._after = None
+        self._exhausted = False
+        self._loading = False
+        self._total = None
+        if self.estimate_total:
+            BackgroundTask(self.tree, self.estimate_total, on_done=self._set_total)
+        self.load_next()
+
+    def load_next(self):
+        self._scheduled = False
+        if self._exhausted or self._loading:
+            return
+        self._loading = True
+        if self.count_label is not None:
+            self.count_label.config(text="Loading...")
+        self._task = BackgroundTask(self.tree, self.fetch_page, self._after, self.page_size,
+                                    on_done=self._on_page, on_error=self._on_error)
+
+    def _on_page(self, page):
+        page = page or []
+        self._task = None
+        self._loading = False
+        self.add_rows(page)
+        if len(page) < self.page_size:
+            self._exhausted = True
+
+    def _on_error(self, error):
+        self._task = None
+        self._loading = False
+        self._exhausted = True
+        print(f"Failed to load page: {error}")
+        self._update_count()
+
+    def _set_total(self, total):
+        self._total = total
+        self._update_count()
+
+    def add_rows(self, page):
+        for row in page:
+            self.tree.insert('', 'end', values=self.to_values(row))
+        if page:
+            self.rows.extend(page)
+            self._after = self.key(page[-1])
+        self._update_count()
+
+    def _update_count(self):
+        if self.count_label is None:
+            return
+        if self._total:
+            self.count_label.config(text=f"Showing {len(self.rows)} of ~{max(self._total, len(self.rows))}")
+        else:
+            self.count_label.config(text=f"Showing {len(self.rows)}")
+
+    def _on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        if float(last) >= 0.9 and not (self._exhausted or self._loading or self._scheduled):
+            self._scheduled = True
+            self.tree.after_idle(self.load_next)
@@ -1,9 +1,21 @@
-import tkinter as tk
-from gui.login_page import LoginPage
-from gui.main_app import EBCManagementSystem
-from database.db_connector import Database
+# Spawned worker processes (batch invoicing) re-import this module as __mp_main__;
+# keep the GUI, the database driver and numpy out of them.
+if __name__ == "__main__":
+    import tkinter as tk
+    from gui.login_page import LoginPage
+    from gui.main_app import EBCManagementSystem
+    from database.db_connector import Database
+    from database import background
+    from database.migrations import run_migrations
+    from database.dao import PublicationDAO
+    from config import QUERY_STATS_ON_EXIT, AUTO_MIGRATE
 
 def main():
+    if AUTO_MIGRATE:
+        run_migrations()
+    # Build the publication search index while the user logs in.
+    background.submit(PublicationDAO.warm_search_index)
+
     root = tk.Tk()
     root.withdraw()
 
@@ -22,6 +34,9 @@ def main():
 
 def on_app_closing(app):
     if tk.messagebox.askokcancel("Quit", "Do you want to exit the application?"):
+        if QUERY_STATS_ON_EXIT:
+            print(Database.query_stats_report())
+        background.shutdown()
         Database.close_connection()
         app.destroy()
 